@@ -2,16 +2,13 @@
 Drug Interaction Prediction API - Production Entry Point
 
 This is the main entry point for the production deployment.
-It imports the Flask app from the src directory.
+It imports the Flask app from the src package.
 """
 
-import sys
-import os
+from src.app import app  # noqa: F401
 
-# Add src directory to Python path
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
-
-from src.app import app
+# Alias for WSGI servers that look for `application` by default
+application = app
 
 if __name__ == '__main__':
     app.run()
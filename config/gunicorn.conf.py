@@ -2,16 +2,37 @@
 Gunicorn configuration for Drug Interaction Prediction API
 """
 
+import gc
 import os
 import multiprocessing
 
+# One OpenMP thread per worker so XGBoost threads don't multiply across workers.
+# Set here because the config is read before the preloaded app imports XGBoost.
+os.environ.setdefault('OMP_NUM_THREADS', '1')
+
 # Server socket
 bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
 backlog = 2048
 
 # Worker processes
-workers = min(multiprocessing.cpu_count() * 2 + 1, 4)  # Cap at 4 workers
-worker_class = "sync"
+# One worker per usable core, capped: each worker runs single-threaded XGBoost but
+# holds its own pair and drug caches. Containers limited by a CPU quota (not
+# affinity) still see every host core here, so set WORKERS explicitly there.
+MAX_DEFAULT_WORKERS = 4
+
+
+def default_workers() -> int:
+    """Number of workers when WORKERS is unset: usable cores, at most MAX_DEFAULT_WORKERS"""
+    if hasattr(os, 'sched_getaffinity'):
+        cores = len(os.sched_getaffinity(0))
+    else:  # macOS and Windows have no affinity API
+        cores = multiprocessing.cpu_count()
+    return max(1, min(cores, MAX_DEFAULT_WORKERS))
+
+
+workers = int(os.getenv('WORKERS', default_workers()))
+worker_class = "gthread"
+threads = int(os.getenv('GUNICORN_THREADS', '2'))
 worker_connections = 1000
 timeout = 120
 keepalive = 2
@@ -49,3 +70,12 @@ preload_app = True
 
 # Enable automatic worker restarts
 reload = os.getenv("DEBUG", "False").lower() == "true"
+
+
+def when_ready(server):
+    """Freeze the preloaded app's objects before workers fork.
+
+    Frozen objects are skipped by the cyclic GC, so workers don't write to
+    (and un-share) the copy-on-write pages holding the model and config.
+    """
+    gc.freeze()
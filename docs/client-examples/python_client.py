@@ -4,16 +4,53 @@ Python Client SDK for Drug Interaction Prediction API
 This module provides a convenient Python interface for the Drug Interaction API.
 """
 
+import asyncio
+import importlib.util
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.request import ACCEPT_ENCODING
+from urllib3.util.retry import Retry
 import json
 from typing import List, Dict, Any, Optional
 from dataclasses import dataclass
+from operator import itemgetter
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import time
 
+try:
+    import orjson
+except ImportError:  # Optional: falls back to the stdlib json module
+    orjson = None
+
+try:
+    import httpx
+except ImportError:  # Optional: only needed for concurrent batch processing
+    httpx = None
+
+# HTTP/2 lets concurrent batch requests share one connection (pip install httpx[http2])
+HTTP2_AVAILABLE = importlib.util.find_spec('h2') is not None
+
+
+def _dumps(obj: Any) -> bytes:
+    """Serialize a request body to JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode('utf-8')
+
+
+def _loads(content: bytes) -> Any:
+    """Parse a JSON response body"""
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
 
 @dataclass
 class Drug:
     """Drug data structure"""
+    __slots__ = ('drug_name', 'pharmacodynamic_class', 'logp', 'therapeutic_index',
+                 'transporter_interaction', 'plasma_protein_binding', 'metabolic_pathways')
+    
     drug_name: str
     pharmacodynamic_class: str
     logp: float
@@ -38,6 +75,9 @@ class Drug:
 @dataclass
 class InteractionPrediction:
     """Interaction prediction result"""
+    __slots__ = ('drug_a_name', 'drug_b_name', 'severity', 'confidence', 'risk_level',
+                 'clinical_significance', 'recommendation', 'probability_distribution')
+    
     drug_a_name: str
     drug_b_name: str
     severity: str
@@ -53,24 +93,98 @@ class DrugInteractionAPIError(Exception):
     pass
 
 
+# Field accessors for the predict-interactions response, bound once at import
+_get_pair_names = itemgetter('drug_a', 'drug_b')
+_get_prediction_fields = itemgetter('severity', 'confidence', 'risk_level')
+_get_prediction_details = itemgetter('drug_pair', 'prediction', 'clinical_significance',
+                                     'recommendation', 'probability_distribution')
+
+
+def _rate_limit_wait(headers: Any, default: float) -> float:
+    """Seconds to wait before the next request, based on the server's rate-limit headers"""
+    retry_after = headers.get('Retry-After')
+    if retry_after is not None:
+        try:
+            return max(float(retry_after), 0.0)
+        except ValueError:  # HTTP-date form
+            return default
+    
+    if headers.get('X-RateLimit-Remaining') == '0':
+        try:
+            return max(float(headers.get('X-RateLimit-Reset')) - time.time(), 0.0)
+        except (TypeError, ValueError):
+            return default
+    
+    return 0.0
+
+
+def _parse_predictions(result: Dict[str, Any]) -> List[InteractionPrediction]:
+    """Convert a predict-interactions response body to InteractionPrediction objects"""
+    predictions = []
+    for pred in result['predictions']:
+        drug_pair, prediction, significance, recommendation, distribution = _get_prediction_details(pred)
+        drug_a, drug_b = _get_pair_names(drug_pair)
+        predictions.append(InteractionPrediction(
+            drug_a['name'], drug_b['name'], *_get_prediction_fields(prediction),
+            significance, recommendation, distribution
+        ))
+    return predictions
+
+
 class DrugInteractionClient:
     """Client for Drug Interaction Prediction API"""
     
-    def __init__(self, base_url: str = "http://localhost:5000", timeout: int = 120):
+    def __init__(self, base_url: str = "http://localhost:5000", timeout: int = 120,
+                 backoff_factor: float = 0.2):
         """
         Initialize the client
         
         Args:
             base_url: Base URL of the API
             timeout: Request timeout in seconds
+            backoff_factor: Retry backoff when the server sends no Retry-After header
         """
         self.base_url = base_url.rstrip('/')
+        self._predict_url = f"{self.base_url}/predict-interactions"
         self.timeout = timeout
-        self.session = requests.Session()
-        self.session.headers.update({
+        self.headers = {
             'Content-Type': 'application/json',
             'User-Agent': 'DrugInteractionClient/1.0.0'
-        })
+        }
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        self.session.headers['Connection'] = 'keep-alive'
+        # Only advertises encodings urllib3 can decode here (zstd needs urllib3>=2.1 + zstandard)
+        self.session.headers['Accept-Encoding'] = ACCEPT_ENCODING
+        
+        self._mount_adapter(backoff_factor=backoff_factor)
+        # Monotonic time before which no new prediction request is sent
+        self._resume_at = 0.0
+    
+    def _mount_adapter(self, backoff_factor: float):
+        """
+        Mount a pooled, retrying HTTP adapter on the session
+        
+        Args:
+            backoff_factor: Retry backoff when the server sends no Retry-After header
+        """
+        # Size the connection pool for concurrent callers so keep-alive
+        # connections are reused instead of discarded when the pool is full.
+        # Predictions have no side effects, so POSTs are safe to retry;
+        # 429 responses are retried after the server's Retry-After delay.
+        adapter = HTTPAdapter(
+            pool_connections=32,
+            pool_maxsize=64,
+            max_retries=Retry(
+                total=3,
+                backoff_factor=backoff_factor,
+                status_forcelist=[429, 502, 503, 504],
+                allowed_methods=['GET', 'POST'],
+                respect_retry_after_header=True
+            )
+        )
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
     
     def health_check(self) -> Dict[str, Any]:
         """
@@ -82,8 +196,8 @@ class DrugInteractionClient:
         try:
             response = self.session.get(f"{self.base_url}/", timeout=self.timeout)
             response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
+            return _loads(response.content)
+        except (requests.exceptions.RequestException, ValueError) as e:
             raise DrugInteractionAPIError(f"Health check failed: {str(e)}")
     
     def detailed_health_check(self) -> Dict[str, Any]:
@@ -96,8 +210,8 @@ class DrugInteractionClient:
         try:
             response = self.session.get(f"{self.base_url}/health", timeout=self.timeout)
             response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
+            return _loads(response.content)
+        except (requests.exceptions.RequestException, ValueError) as e:
             raise DrugInteractionAPIError(f"Detailed health check failed: {str(e)}")
     
     def predict_interactions(self, drugs: List[Drug]) -> List[InteractionPrediction]:
@@ -110,50 +224,50 @@ class DrugInteractionClient:
         Returns:
             List of InteractionPrediction objects
         """
-        if len(drugs) < 2:
-            raise ValueError("At least 2 drugs are required for interaction prediction")
-        
-        if len(drugs) > 10:
-            raise ValueError("Maximum 10 drugs allowed per request")
+        request_data = self._build_request(drugs)
         
-        # Convert drugs to API format
-        request_data = {
-            'drugs': [drug.to_dict() for drug in drugs]
-        }
+        # Only pace requests when the server has said its quota is exhausted
+        wait = self._resume_at - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
         
         try:
             response = self.session.post(
-                f"{self.base_url}/predict-interactions",
-                json=request_data,
+                self._predict_url,
+                data=_dumps(request_data),
                 timeout=self.timeout
             )
             
             if response.status_code == 400:
-                error_data = response.json()
+                error_data = _loads(response.content)
                 raise DrugInteractionAPIError(f"Validation error: {error_data.get('error', 'Unknown validation error')}")
             
             response.raise_for_status()
-            result = response.json()
             
-            # Convert to InteractionPrediction objects
-            predictions = []
-            for pred in result['predictions']:
-                predictions.append(InteractionPrediction(
-                    drug_a_name=pred['drug_pair']['drug_a']['name'],
-                    drug_b_name=pred['drug_pair']['drug_b']['name'],
-                    severity=pred['prediction']['severity'],
-                    confidence=pred['prediction']['confidence'],
-                    risk_level=pred['prediction']['risk_level'],
-                    clinical_significance=pred['clinical_significance'],
-                    recommendation=pred['recommendation'],
-                    probability_distribution=pred['probability_distribution']
-                ))
+            wait = _rate_limit_wait(response.headers, 0.0)
+            if wait:
+                self._resume_at = time.monotonic() + wait
             
-            return predictions
+            # Convert to InteractionPrediction objects
+            return _parse_predictions(_loads(response.content))
             
-        except requests.exceptions.RequestException as e:
+        except (requests.exceptions.RequestException, ValueError) as e:
+            # ValueError: the body was not valid JSON (e.g. a proxy error page)
             raise DrugInteractionAPIError(f"Prediction request failed: {str(e)}")
     
+    def _build_request(self, drugs: List[Drug]) -> Dict[str, Any]:
+        """Validate the drug count and build the predict-interactions request body"""
+        n = len(drugs)
+        if not 2 <= n <= 10:
+            if n < 2:
+                raise ValueError("At least 2 drugs are required for interaction prediction")
+            raise ValueError("Maximum 10 drugs allowed per request")
+        
+        # Convert drugs to API format
+        return {
+            'drugs': [drug.to_dict() for drug in drugs]
+        }
+    
     def get_api_info(self) -> Dict[str, Any]:
         """
         Get API information
@@ -164,8 +278,8 @@ class DrugInteractionClient:
         try:
             response = self.session.get(f"{self.base_url}/api/info", timeout=self.timeout)
             response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
+            return _loads(response.content)
+        except (requests.exceptions.RequestException, ValueError) as e:
             raise DrugInteractionAPIError(f"API info request failed: {str(e)}")
 
 
@@ -173,42 +287,115 @@ class DrugInteractionBatchClient(DrugInteractionClient):
     """Extended client with batch processing capabilities"""
     
     def __init__(self, base_url: str = "http://localhost:5000", timeout: int = 120, 
-                 rate_limit_delay: float = 0.1):
+                 rate_limit_delay: float = 0.1, max_workers: int = 10):
         """
         Initialize batch client
         
         Args:
             base_url: Base URL of the API
             timeout: Request timeout in seconds
-            rate_limit_delay: Delay between requests to avoid rate limiting
+            rate_limit_delay: Backoff after a 429 response without a Retry-After header
+            max_workers: Maximum number of batches processed concurrently
         """
-        super().__init__(base_url, timeout)
+        super().__init__(base_url, timeout, backoff_factor=rate_limit_delay)
         self.rate_limit_delay = rate_limit_delay
+        self.max_workers = max_workers
     
     def predict_interactions_batch(self, drug_batches: List[List[Drug]]) -> List[List[InteractionPrediction]]:
         """
-        Process multiple batches of drugs
+        Process multiple batches of drugs concurrently using a thread pool
+        
+        All threads share the client's pooled requests session.
         
         Args:
             drug_batches: List of drug lists to process
             
         Returns:
-            List of prediction results for each batch
+            List of prediction results for each batch, in input order
         """
-        results = []
+        results = [None] * len(drug_batches)
+        predict = self.predict_interactions
+        
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            submit = executor.submit
+            futures = {
+                submit(predict, drugs): i
+                for i, drugs in enumerate(drug_batches)
+            }
+            
+            for future in as_completed(futures):
+                i = futures[future]
+                try:
+                    results[i] = future.result()
+                except DrugInteractionAPIError as e:
+                    print(f"Batch {i+1} failed: {str(e)}")
+                    results[i] = []
         
-        for i, drugs in enumerate(drug_batches):
-            try:
-                predictions = self.predict_interactions(drugs)
-                results.append(predictions)
-                
-                # Rate limiting delay
-                if i < len(drug_batches) - 1:
-                    time.sleep(self.rate_limit_delay)
+        return results
+    
+    async def predict_interactions_batch_async(self, drug_batches: List[List[Drug]],
+                                               max_concurrency: int = 10) -> List[List[InteractionPrediction]]:
+        """
+        Process multiple batches of drugs concurrently
+        
+        Args:
+            drug_batches: List of drug lists to process
+            max_concurrency: Maximum number of requests in flight at once
+            
+        Returns:
+            List of prediction results for each batch, in input order
+        """
+        if httpx is None:
+            raise DrugInteractionAPIError("httpx is required for async batch processing (pip install httpx[http2])")
+        
+        # Build every request body up front so invalid batches fail fast
+        request_bodies = [self._build_request(drugs) for drugs in drug_batches]
+        url = self._predict_url
+        semaphore = asyncio.Semaphore(max_concurrency)
+        limits = httpx.Limits(max_connections=max_concurrency, max_keepalive_connections=max_concurrency,
+                              keepalive_expiry=30)
+        
+        async with httpx.AsyncClient(http2=HTTP2_AVAILABLE, limits=limits, timeout=self.timeout,
+                                     headers=self.headers) as client:
+            
+            async def _one(request_data: Dict[str, Any]) -> Dict[str, Any]:
+                async with semaphore:
+                    body = _dumps(request_data)
+                    for attempt in range(4):
+                        try:
+                            response = await client.post(url, content=body)
+                        except httpx.HTTPError as e:
+                            raise DrugInteractionAPIError(f"Prediction request failed: {str(e)}")
+                        
+                        if response.status_code != 429 or attempt == 3:
+                            break
+                        await asyncio.sleep(_rate_limit_wait(response.headers, self.rate_limit_delay))
                     
-            except DrugInteractionAPIError as e:
-                print(f"Batch {i+1} failed: {str(e)}")
+                    try:
+                        if response.status_code == 400:
+                            error_data = _loads(response.content)
+                            raise DrugInteractionAPIError(f"Validation error: {error_data.get('error', 'Unknown validation error')}")
+                        
+                        if response.is_error:
+                            raise DrugInteractionAPIError(f"Prediction request failed: HTTP {response.status_code}")
+                        
+                        return _loads(response.content)
+                    except ValueError as e:
+                        # The body was not valid JSON (e.g. a proxy error page or a truncated response)
+                        raise DrugInteractionAPIError(f"Prediction request failed: {str(e)}")
+            
+            responses = await asyncio.gather(*[_one(body) for body in request_bodies],
+                                             return_exceptions=True)
+        
+        results = []
+        for i, result in enumerate(responses):
+            if isinstance(result, DrugInteractionAPIError):
+                print(f"Batch {i+1} failed: {str(result)}")
                 results.append([])
+            elif isinstance(result, BaseException):
+                raise result
+            else:
+                results.append(_parse_predictions(result))
         
         return results
 
@@ -7,17 +7,50 @@ Supports local backups, cloud storage, and automated scheduling.
 """
 
 import os
+import io
+import hashlib
 import shutil
+import tempfile
 import json
-import hashlib
-import gzip
-import tarfile
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 import argparse
 import logging
 import sys
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import TYPE_CHECKING, List, Dict, Any, Optional
+
+if TYPE_CHECKING:
+    import tarfile
+
+try:
+    import zstandard as zstd
+except ImportError:  # Optional: only needed for --compression zstd
+    zstd = None
+
+# Buffer size for copying restored files out of an archive
+COPY_BUFFER_SIZE = 1 << 20
+
+# Archive suffix for each supported compression; gzip is the default because
+# zstd archives can only be restored where zstandard is installed
+COMPRESSION_SUFFIXES = {'gz': '.tar.gz', 'zstd': '.tar.zst'}
+ARCHIVE_SUFFIXES = tuple(COMPRESSION_SUFFIXES.values())
+
+
+class HashingReader:
+    """File wrapper that feeds every chunk read through it into a SHA256 hash"""
+    
+    def __init__(self, f):
+        self.f = f
+        self.hash = hashlib.sha256()
+    
+    def read(self, size: int = -1) -> bytes:
+        data = self.f.read(size)
+        self.hash.update(data)
+        return data
+    
+    def hexdigest(self) -> str:
+        return self.hash.hexdigest()
 
 
 class ModelBackupManager:
@@ -41,36 +74,138 @@ class ModelBackupManager:
             'preprocessing_config.py'
         ]
     
-    def calculate_file_hash(self, file_path: Path) -> str:
-        """Calculate SHA256 hash of a file"""
-        sha256_hash = hashlib.sha256()
-        with open(file_path, "rb") as f:
-            for byte_block in iter(lambda: f.read(4096), b""):
-                sha256_hash.update(byte_block)
-        return sha256_hash.hexdigest()
-    
-    def get_file_info(self, file_path: Path) -> Dict[str, Any]:
-        """Get file information including size, modification time, and hash"""
-        if not file_path.exists():
-            return None
+    def add_file_to_archive(self, tar: 'tarfile.TarFile', file_path: Path, arcname: str) -> Dict[str, Any]:
+        """Add a file to an archive, hashing it in the same pass, and return its file information"""
+        with open(file_path, 'rb') as f:
+            # Build the header from the open file (fstat) rather than stat-ing the path again
+            tarinfo = tar.gettarinfo(arcname=arcname, fileobj=f)
+            mtime_ns = os.fstat(f.fileno()).st_mtime_ns
+            reader = HashingReader(f)
+            tar.addfile(tarinfo, reader)
         
-        stat = file_path.stat()
         return {
             'path': str(file_path),
-            'size': stat.st_size,
-            'modified': datetime.fromtimestamp(stat.st_mtime).isoformat(),
-            'hash': self.calculate_file_hash(file_path)
+            'size': tarinfo.size,
+            'modified': datetime.fromtimestamp(tarinfo.mtime).isoformat(),
+            'mtime_ns': mtime_ns,
+            'hash': reader.hexdigest()
         }
     
-    def create_backup(self, backup_name: str = None) -> str:
-        """Create a backup of model files"""
+    def scan_model_files(self) -> Dict[str, os.stat_result]:
+        """Stat the backup files present in the model directory with a single directory scan"""
+        try:
+            with os.scandir(self.model_dir) as entries:
+                return {
+                    entry.name: entry.stat()
+                    for entry in entries
+                    if entry.name in self.backup_files and entry.is_file()
+                }
+        except FileNotFoundError:
+            return {}
+    
+    def find_reusable_backup(self, compression: str = 'gz',
+                             file_stats: Optional[Dict[str, os.stat_result]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Return the newest backup if it can stand in for a new one
+        
+        Args:
+            compression: Compression the new backup would use; the latest backup must match it
+            file_stats: Result of scan_model_files (scanned here when omitted)
+            
+        Returns:
+            Backup information, or None if a new backup is needed
+        """
+        if file_stats is None:
+            file_stats = self.scan_model_files()
+        
+        unchanged_backup = self.find_unchanged_backup(file_stats)
+        if unchanged_backup and unchanged_backup['file'].endswith(COMPRESSION_SUFFIXES[compression]):
+            return unchanged_backup
+        return None
+    
+    def find_unchanged_backup(self, file_stats: Dict[str, os.stat_result]) -> Optional[Dict[str, Any]]:
+        """Return the newest backup if no model file has changed since it was taken"""
+        backups = self.list_backups()
+        if not backups or 'metadata' not in backups[0]:
+            return None
+        
+        latest = backups[0]
+        recorded_files = latest['metadata'].get('files', {})
+        
+        for filename in self.backup_files:
+            recorded = recorded_files.get(filename)
+            stat = file_stats.get(filename)
+            
+            if recorded is None or stat is None:
+                if recorded is not stat:
+                    return None
+            elif recorded.get('size') != stat.st_size or recorded.get('mtime_ns') != stat.st_mtime_ns:
+                return None
+        
+        return latest
+    
+    def get_archive_path(self, backup_name: str) -> Optional[Path]:
+        """Find the archive for a backup name, whichever format it was written in"""
+        for suffix in ARCHIVE_SUFFIXES:
+            archive_path = self.backup_dir / f"{backup_name}{suffix}"
+            if archive_path.exists():
+                return archive_path
+        return None
+    
+    def get_metadata_path(self, backup_name: str) -> Path:
+        """Path of the sidecar metadata file stored next to a backup archive"""
+        return self.backup_dir / f"{backup_name}.json"
+    
+    @contextmanager
+    def open_archive_for_write(self, archive_path: Path):
+        """Open a tar archive for writing, gzip- or zstd-compressed (on all cores) by suffix"""
+        import tarfile
+        
+        if archive_path.name.endswith('.tar.zst'):
+            compressor = zstd.ZstdCompressor(level=3, threads=-1)
+            with open(archive_path, 'wb') as fh, compressor.stream_writer(fh) as writer, \
+                    tarfile.open(fileobj=writer, mode='w|') as tar:
+                yield tar
+        else:
+            with tarfile.open(archive_path, 'w:gz') as tar:
+                yield tar
+    
+    @contextmanager
+    def open_archive_for_read(self, archive_path: Path):
+        """Open a tar archive for sequential (streaming) reading"""
+        import tarfile
+        
+        if archive_path.name.endswith('.tar.zst'):
+            if zstd is None:
+                raise RuntimeError(f"zstandard is required to read {archive_path.name} (pip install zstandard)")
+            with open(archive_path, 'rb') as fh, zstd.ZstdDecompressor().stream_reader(fh) as reader, \
+                    tarfile.open(fileobj=reader, mode='r|') as tar:
+                yield tar
+        else:
+            with tarfile.open(archive_path, 'r|gz') as tar:
+                yield tar
+    
+    def create_backup(self, backup_name: str = None, force: bool = False, compression: str = 'gz') -> str:
+        """Create a backup of model files, reusing the latest one if nothing has changed"""
+        import tarfile
+        
+        if compression == 'zstd' and zstd is None:
+            raise RuntimeError("zstandard is required for zstd backups (pip install zstandard)")
+        
+        file_stats = self.scan_model_files()
+        
+        # Skip the backup entirely when size and mtime match the latest one, unless a
+        # specific name was asked for (it must exist afterwards for restore/verify)
+        if not force and not backup_name:
+            unchanged_backup = self.find_reusable_backup(compression, file_stats)
+            if unchanged_backup:
+                self.logger.info(f"Model files unchanged since {unchanged_backup['name']}, skipping backup")
+                return unchanged_backup['file']
+        
         if not backup_name:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             backup_name = f"model_backup_{timestamp}"
         
-        backup_path = self.backup_dir / backup_name
-        backup_path.mkdir(exist_ok=True)
-        
         backup_info = {
             'backup_name': backup_name,
             'timestamp': datetime.now().isoformat(),
@@ -80,38 +215,33 @@ class ModelBackupManager:
         
         self.logger.info(f"Creating backup: {backup_name}")
         
-        # Backup each file
-        for filename in self.backup_files:
-            source_path = self.model_dir / filename
-            
-            if source_path.exists():
-                dest_path = backup_path / filename
-                
-                # Copy file
-                shutil.copy2(source_path, dest_path)
-                
-                # Get file info
-                file_info = self.get_file_info(dest_path)
-                backup_info['files'][filename] = file_info
-                backup_info['total_size'] += file_info['size']
-                
-                self.logger.info(f"  ✅ Backed up: {filename} ({file_info['size']} bytes)")
-            else:
-                self.logger.warning(f"  ⚠️ File not found: {filename}")
-                backup_info['files'][filename] = None
-        
-        # Save backup metadata
-        metadata_path = backup_path / 'backup_info.json'
-        with open(metadata_path, 'w') as f:
-            json.dump(backup_info, f, indent=2)
+        # Stream files straight from the model directory into the archive
+        archive_path = self.backup_dir / f"{backup_name}{COMPRESSION_SUFFIXES[compression]}"
         
-        # Create compressed archive
-        archive_path = self.backup_dir / f"{backup_name}.tar.gz"
-        with tarfile.open(archive_path, 'w:gz') as tar:
-            tar.add(backup_path, arcname=backup_name)
+        with self.open_archive_for_write(archive_path) as tar:
+            # Backup each file
+            for filename in self.backup_files:
+                source_path = self.model_dir / filename
+                
+                if filename in file_stats:
+                    file_info = self.add_file_to_archive(tar, source_path, f"{backup_name}/{filename}")
+                    backup_info['files'][filename] = file_info
+                    backup_info['total_size'] += file_info['size']
+                    
+                    self.logger.info(f"  ✅ Backed up: {filename} ({file_info['size']} bytes)")
+                else:
+                    self.logger.warning(f"  ⚠️ File not found: {filename}")
+                    backup_info['files'][filename] = None
+            
+            # Save backup metadata
+            metadata = json.dumps(backup_info, indent=2).encode('utf-8')
+            metadata_info = tarfile.TarInfo(f"{backup_name}/backup_info.json")
+            metadata_info.size = len(metadata)
+            metadata_info.mtime = int(datetime.now().timestamp())
+            tar.addfile(metadata_info, io.BytesIO(metadata))
         
-        # Remove uncompressed backup directory
-        shutil.rmtree(backup_path)
+        # Also keep the metadata next to the archive so listing never has to decompress it
+        self.get_metadata_path(backup_name).write_bytes(metadata)
         
         archive_size = archive_path.stat().st_size
         self.logger.info(f"✅ Backup created: {archive_path} ({archive_size} bytes)")
@@ -122,24 +252,38 @@ class ModelBackupManager:
         """List all available backups"""
         backups = []
         
-        for backup_file in self.backup_dir.glob("model_backup_*.tar.gz"):
-            stat = backup_file.stat()
-            
+        archives = []
+        sidecars = set()
+        
+        # One directory scan finds archives and sidecars; DirEntry caches the stat result
+        with os.scandir(self.backup_dir) as entries:
+            for entry in entries:
+                if not entry.name.startswith('model_backup_'):
+                    continue
+                if entry.name.endswith(ARCHIVE_SUFFIXES):
+                    archives.append((entry.name.rsplit('.tar.', 1)[0], entry.path, entry.stat()))
+                elif entry.name.endswith('.json'):
+                    sidecars.add(entry.name[:-len('.json')])
+        
+        for name, path, stat in archives:
             backup_info = {
-                'name': backup_file.stem,
-                'file': str(backup_file),
+                'name': name,
+                'file': path,
                 'size': stat.st_size,
                 'created': datetime.fromtimestamp(stat.st_ctime).isoformat(),
                 'modified': datetime.fromtimestamp(stat.st_mtime).isoformat()
             }
             
-            # Try to extract metadata if available
+            # Read the sidecar metadata, falling back to the archive for older backups
             try:
-                with tarfile.open(backup_file, 'r:gz') as tar:
-                    metadata_member = tar.getmember(f"{backup_file.stem}/backup_info.json")
-                    metadata_file = tar.extractfile(metadata_member)
-                    metadata = json.load(metadata_file)
-                    backup_info['metadata'] = metadata
+                if name in sidecars:
+                    backup_info['metadata'] = json.loads(self.get_metadata_path(name).read_text())
+                else:
+                    with self.open_archive_for_read(Path(path)) as tar:
+                        for member in tar:
+                            if member.name == f"{name}/backup_info.json":
+                                backup_info['metadata'] = json.load(tar.extractfile(member))
+                                break
             except:
                 pass
             
@@ -152,10 +296,10 @@ class ModelBackupManager:
     
     def restore_backup(self, backup_name: str, confirm: bool = False) -> bool:
         """Restore from a backup"""
-        backup_file = self.backup_dir / f"{backup_name}.tar.gz"
+        backup_file = self.get_archive_path(backup_name)
         
-        if not backup_file.exists():
-            self.logger.error(f"Backup not found: {backup_file}")
+        if backup_file is None:
+            self.logger.error(f"Backup not found: {backup_name}")
             return False
         
         if not confirm:
@@ -167,33 +311,62 @@ class ModelBackupManager:
         
         self.logger.info(f"Restoring backup: {backup_name}")
         
-        # Create temporary extraction directory
-        temp_dir = self.backup_dir / f"temp_restore_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-        temp_dir.mkdir(exist_ok=True)
-        
+        staged = {}
         try:
-            # Extract backup
-            with tarfile.open(backup_file, 'r:gz') as tar:
-                tar.extractall(temp_dir)
+            wanted = {f"{backup_name}/{filename}": filename for filename in self.backup_files}
+            metadata_member = f"{backup_name}/backup_info.json"
             
-            extracted_dir = temp_dir / backup_name
+            # Recorded hashes come from the sidecar, or from the archive itself for older backups
+            metadata = None
+            metadata_path = self.get_metadata_path(backup_name)
+            if metadata_path.exists():
+                metadata = json.loads(metadata_path.read_text())
             
-            # Restore each file
-            for filename in self.backup_files:
-                source_path = extracted_dir / filename
+            # Stage every member in a temp file next to its destination; live files stay untouched
+            with self.open_archive_for_read(backup_file) as tar:
+                for member in tar:
+                    if member.name == metadata_member and metadata is None:
+                        metadata = json.load(tar.extractfile(member))
+                        continue
+                    
+                    filename = wanted.get(member.name)
+                    if filename is None or not member.isfile():
+                        continue
+                    
+                    fd, temp_path = tempfile.mkstemp(dir=self.model_dir, prefix=f".{filename}.", suffix='.restore')
+                    staged[filename] = (temp_path, None)
+                    reader = HashingReader(tar.extractfile(member))
+                    with os.fdopen(fd, 'wb') as out:
+                        shutil.copyfileobj(reader, out, COPY_BUFFER_SIZE)
+                    os.chmod(temp_path, member.mode & 0o777)
+                    staged[filename] = (temp_path, reader.hexdigest())
+            
+            # Check each staged file against the hash recorded when the backup was taken
+            recorded_files = (metadata or {}).get('files', {})
+            for filename, (temp_path, digest) in staged.items():
+                expected = (recorded_files.get(filename) or {}).get('hash')
+                if expected is None:
+                    self.logger.warning(f"  ⚠️ No recorded hash for {filename}, skipping verification")
+                elif digest != expected:
+                    raise ValueError(f"Hash mismatch for {filename}: backup is corrupt")
+            
+            # Every member was read in full and verified, so swap them into place
+            for filename, (temp_path, _) in staged.items():
                 dest_path = self.model_dir / filename
                 
-                if source_path.exists():
-                    # Backup current file if it exists
-                    if dest_path.exists():
-                        backup_current = dest_path.with_suffix(dest_path.suffix + '.backup')
-                        shutil.copy2(dest_path, backup_current)
-                        self.logger.info(f"  📦 Current file backed up: {backup_current}")
-                    
-                    # Restore file
-                    shutil.copy2(source_path, dest_path)
-                    self.logger.info(f"  ✅ Restored: {filename}")
-                else:
+                # Backup current file if it exists
+                if dest_path.exists():
+                    backup_current = dest_path.with_suffix(dest_path.suffix + '.backup')
+                    shutil.copy2(dest_path, backup_current)
+                    shutil.copymode(dest_path, temp_path)
+                    self.logger.info(f"  📦 Current file backed up: {backup_current}")
+                
+                # Restore file
+                os.replace(temp_path, dest_path)
+                self.logger.info(f"  ✅ Restored: {filename}")
+            
+            for filename in self.backup_files:
+                if filename not in staged:
                     self.logger.warning(f"  ⚠️ File not in backup: {filename}")
             
             self.logger.info("✅ Restore completed successfully")
@@ -204,9 +377,10 @@ class ModelBackupManager:
             return False
         
         finally:
-            # Clean up temporary directory
-            if temp_dir.exists():
-                shutil.rmtree(temp_dir)
+            # Drop staged files that were never moved into place
+            for temp_path, _ in staged.values():
+                if os.path.exists(temp_path):
+                    os.unlink(temp_path)
     
     def cleanup_old_backups(self, keep_days: int = 30, keep_count: int = 10):
         """Clean up old backups based on age and count"""
@@ -238,40 +412,42 @@ class ModelBackupManager:
             backup_file = Path(backup['file'])
             try:
                 backup_file.unlink()
+                self.get_metadata_path(backup['name']).unlink(missing_ok=True)
                 self.logger.info(f"  🗑️ Deleted: {backup['name']}")
             except Exception as e:
                 self.logger.error(f"  ❌ Failed to delete {backup['name']}: {str(e)}")
     
     def verify_backup(self, backup_name: str) -> bool:
         """Verify backup integrity"""
-        backup_file = self.backup_dir / f"{backup_name}.tar.gz"
+        backup_file = self.get_archive_path(backup_name)
         
-        if not backup_file.exists():
-            self.logger.error(f"Backup not found: {backup_file}")
+        if backup_file is None:
+            self.logger.error(f"Backup not found: {backup_name}")
             return False
         
         self.logger.info(f"Verifying backup: {backup_name}")
         
         try:
             # Test archive extraction
-            with tarfile.open(backup_file, 'r:gz') as tar:
-                # Check if all expected files are present
-                members = tar.getnames()
+            with self.open_archive_for_read(backup_file) as tar:
+                members = []
+                metadata_path = f"{backup_name}/backup_info.json"
+                
+                for member in tar:
+                    members.append(member.name)
+                    
+                    # Try to extract metadata
+                    if member.name == metadata_path:
+                        metadata = json.load(tar.extractfile(member))
+                        self.logger.info(f"  📋 Backup metadata: {metadata['timestamp']}")
                 
+                # Check if all expected files are present
                 for filename in self.backup_files:
                     expected_path = f"{backup_name}/{filename}"
                     if expected_path not in members:
                         self.logger.error(f"  ❌ Missing file in backup: {filename}")
                         return False
                 
-                # Try to extract metadata
-                metadata_path = f"{backup_name}/backup_info.json"
-                if metadata_path in members:
-                    metadata_member = tar.getmember(metadata_path)
-                    metadata_file = tar.extractfile(metadata_member)
-                    metadata = json.load(metadata_file)
-                    self.logger.info(f"  📋 Backup metadata: {metadata['timestamp']}")
-                
             self.logger.info("✅ Backup verification successful")
             return True
             
@@ -296,6 +472,11 @@ def main():
                        help='Number of recent backups to keep (default: 10)')
     parser.add_argument('--confirm', action='store_true',
                        help='Skip confirmation prompts')
+    parser.add_argument('--force', action='store_true',
+                       help='Create a new backup even if model files are unchanged')
+    parser.add_argument('--compression', choices=sorted(COMPRESSION_SUFFIXES), default='gz',
+                       help='Archive compression for new backups; zstd is faster but needs '
+                            'zstandard to restore (default: gz)')
     
     args = parser.parse_args()
     
@@ -303,8 +484,12 @@ def main():
     manager = ModelBackupManager(model_dir=args.model_dir, backup_dir=args.backup_dir)
     
     if args.action == 'create':
-        backup_path = manager.create_backup()
-        print(f"✅ Backup created: {backup_path}")
+        reusable = None if args.force else manager.find_reusable_backup(args.compression)
+        if reusable:
+            print(f"✅ Model files unchanged, reusing {reusable['file']}")
+        else:
+            backup_path = manager.create_backup(force=True, compression=args.compression)
+            print(f"✅ Backup created: {backup_path}")
     
     elif args.action == 'list':
         backups = manager.list_backups()
@@ -7,29 +7,108 @@ for production hosting of the Drug Interaction Prediction API.
 """
 
 import os
-import shutil
+import io
+import gzip
+import tarfile
 import zipfile
+from contextlib import contextmanager
+from fnmatch import fnmatch
 import json
+import time
 from datetime import datetime
 from pathlib import Path
+from typing import Union
 import argparse
 
+try:
+    import orjson
+except ImportError:  # Optional: falls back to the stdlib json module
+    orjson = None
 
-def create_deployment_package(output_dir: str = ".", package_name: str = None):
+# Already-compressed files are stored as-is (model pickles still deflate ~3x, so they are compressed)
+STORED_SUFFIXES = {'.png', '.jpg', '.zip', '.gz', '.whl'}
+ARCHIVE_BUFFER_SIZE = 1 << 20
+# Build artifacts and local tooling state that never ship
+IGNORE_PATTERNS = ('__pycache__', '*.pyc', '.git', '.pytest_cache', '.mypy_cache', '.venv', '.DS_Store', '*.log')
+ARCHIVE_EXTENSIONS = {'zip': '.zip', 'tar.gz': '.tar.gz'}
+
+Archive = Union[zipfile.ZipFile, tarfile.TarFile]
+
+
+@contextmanager
+def _open_archive(archive_path: Path, archive_format: str):
+    """Open the package archive for streaming writes (fast compression, 1 MiB OS-level writes)"""
+    with open(archive_path, 'wb', buffering=ARCHIVE_BUFFER_SIZE) as archive_file:
+        if archive_format == 'zip':
+            with zipfile.ZipFile(archive_file, 'w', zipfile.ZIP_DEFLATED, compresslevel=1) as archive:
+                yield archive
+        else:
+            # tar.gz streams with constant memory and no per-file central directory
+            with gzip.GzipFile(fileobj=archive_file, mode='wb', compresslevel=1) as gz, \
+                    tarfile.open(fileobj=gz, mode='w|') as archive:
+                yield archive
+
+
+def _archive_names(archive: Archive) -> set:
+    """Names already written to the archive"""
+    if isinstance(archive, zipfile.ZipFile):
+        return set(archive.namelist())
+    return set(archive.getnames())
+
+
+def _add_file(archive: Archive, path: str, arcname: str):
+    """Add a source file to the package archive"""
+    if isinstance(archive, zipfile.ZipFile):
+        archive.write(path, arcname, compress_type=_compress_type(path))
+    else:
+        archive.add(path, arcname=arcname, recursive=False)
+
+
+def _write_generated_file(archive: Archive, arcname: str, content: Union[str, bytes], mode: int = 0o644):
+    """Write an in-memory file into the package archive"""
+    if isinstance(archive, zipfile.ZipFile):
+        info = zipfile.ZipInfo(arcname, date_time=datetime.now().timetuple()[:6])
+        info.external_attr = (0o100000 | mode) << 16
+        archive.writestr(info, content, compress_type=zipfile.ZIP_DEFLATED)
+    else:
+        data = content.encode('utf-8') if isinstance(content, str) else content
+        info = tarfile.TarInfo(arcname)
+        info.size = len(data)
+        info.mode = mode
+        info.mtime = int(time.time())
+        archive.addfile(info, io.BytesIO(data))
+
+
+def _compress_type(path: str) -> int:
+    """Pick the zip compression method for a source file"""
+    return zipfile.ZIP_STORED if os.path.splitext(path)[1] in STORED_SUFFIXES else zipfile.ZIP_DEFLATED
+
+
+def _iter_files(directory: str, arc_prefix: str):
+    """Yield (path, arcname) for every regular file below a directory, using cached scandir types"""
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if any(fnmatch(entry.name, pattern) for pattern in IGNORE_PATTERNS):
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                yield from _iter_files(entry.path, arc_prefix + entry.name + '/')
+            elif entry.is_file(follow_symlinks=False):
+                yield entry.path, arc_prefix + entry.name
+
+
+def create_deployment_package(output_dir: str = ".", package_name: str = None, archive_format: str = 'zip'):
     """Create a complete deployment package"""
     
     if not package_name:
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        timestamp = time.strftime("%Y%m%d_%H%M%S")
         package_name = f"drug-interaction-api-production-{timestamp}"
     
     output_path = Path(output_dir)
-    package_path = output_path / package_name
+    output_path.mkdir(parents=True, exist_ok=True)
+    archive_path = output_path / f"{package_name}{ARCHIVE_EXTENSIONS[archive_format]}"
     
     print(f"🚀 Creating deployment package: {package_name}")
-    print(f"📁 Output directory: {package_path}")
-    
-    # Create package directory
-    package_path.mkdir(parents=True, exist_ok=True)
+    print(f"📦 Creating {archive_format} archive: {archive_path}")
     
     # Define file structure for deployment
     deployment_structure = {
@@ -59,34 +138,37 @@ def create_deployment_package(output_dir: str = ".", package_name: str = None):
         'tests/': 'tests/',
     }
     
-    # Copy files and directories
-    for source, dest in deployment_structure.items():
-        source_path = Path(source)
-        dest_path = package_path / dest
+    # Stream files straight into the archive instead of staging a copy on disk
+    with _open_archive(archive_path, archive_format) as archive:
+        # Generated files go in first and replace any source file of the same name
+        create_systemd_service(archive, package_name)
+        create_deployment_readme(archive, package_name)
+        create_quick_start_script(archive, package_name)
+        create_package_info(archive, package_name)
+        written = _archive_names(archive)
         
-        if source_path.exists():
-            if source_path.is_file():
-                dest_path.parent.mkdir(parents=True, exist_ok=True)
-                shutil.copy2(source_path, dest_path)
-                print(f"  ✅ Copied file: {source}")
-            elif source_path.is_dir():
-                shutil.copytree(source_path, dest_path, dirs_exist_ok=True)
-                print(f"  ✅ Copied directory: {source}")
-        else:
-            print(f"  ⚠️ Not found: {source}")
-    
-    # Create additional deployment files
-    create_systemd_service(package_path)
-    create_deployment_readme(package_path)
-    create_quick_start_script(package_path)
-    create_package_info(package_path, package_name)
-    
-    # Create compressed archive
-    archive_path = output_path / f"{package_name}.zip"
-    create_zip_archive(package_path, archive_path)
+        # One directory listing answers every exists/is_file/is_dir question below
+        with os.scandir('.') as it:
+            top_level = {entry.name: entry for entry in it}
+        
+        for source, dest in deployment_structure.items():
+            entry = top_level.get(source.rstrip('/'))
+            
+            if entry is not None:
+                if entry.is_file():
+                    arcname = f"{package_name}/{dest}"
+                    if arcname not in written:
+                        _add_file(archive, source, arcname)
+                    print(f"  ✅ Added file: {source}")
+                elif entry.is_dir():
+                    for file_path, arcname in _iter_files(source, f"{package_name}/{dest}"):
+                        if arcname not in written:
+                            _add_file(archive, file_path, arcname)
+                    print(f"  ✅ Added directory: {source}")
+            else:
+                print(f"  ⚠️ Not found: {source}")
     
-    # Clean up temporary directory
-    shutil.rmtree(package_path)
+    print(f"  ✅ Archive created successfully")
     
     print(f"\n🎉 Deployment package created successfully!")
     print(f"📦 Package: {archive_path}")
@@ -95,9 +177,7 @@ def create_deployment_package(output_dir: str = ".", package_name: str = None):
     return str(archive_path)
 
 
-def create_systemd_service(package_path: Path):
-    """Create systemd service file"""
-    service_content = """[Unit]
+_SYSTEMD_SERVICE_TMPL = """[Unit]
 Description=Drug Interaction Prediction API
 After=network.target
 
@@ -122,19 +202,16 @@ TimeoutStopSec=5
 [Install]
 WantedBy=multi-user.target
 """
-    
-    deployment_dir = package_path / 'deployment'
-    deployment_dir.mkdir(exist_ok=True)
-    
-    with open(deployment_dir / 'drug-interaction-api.service', 'w') as f:
-        f.write(service_content)
+
+
+def create_systemd_service(archive: Archive, package_name: str):
+    """Create systemd service file"""
+    _write_generated_file(archive, f"{package_name}/deployment/drug-interaction-api.service", _SYSTEMD_SERVICE_TMPL)
     
     print("  ✅ Created systemd service file")
 
 
-def create_deployment_readme(package_path: Path):
-    """Create deployment-specific README"""
-    readme_content = """# Drug Interaction Prediction API - Production Deployment
+_README_TMPL = """# Drug Interaction Prediction API - Production Deployment
 
 ## 🚀 Quick Start
 
@@ -213,16 +290,16 @@ For deployment assistance, refer to:
 This software is provided for healthcare and research purposes.
 Please ensure compliance with applicable regulations and guidelines.
 """
-    
-    with open(package_path / 'README.md', 'w') as f:
-        f.write(readme_content)
+
+
+def create_deployment_readme(archive: Archive, package_name: str):
+    """Create deployment-specific README"""
+    _write_generated_file(archive, f"{package_name}/README.md", _README_TMPL)
     
     print("  ✅ Created deployment README")
 
 
-def create_quick_start_script(package_path: Path):
-    """Create quick start deployment script"""
-    script_content = """#!/bin/bash
+_QUICK_START_TMPL = """#!/bin/bash
 # Quick Start Deployment Script for Drug Interaction API
 
 set -e
@@ -352,74 +429,67 @@ echo "   4. Set up monitoring: crontab -e (add health monitoring)"
 echo ""
 echo "📖 For detailed configuration, see PRODUCTION_CHECKLIST.md"
 """
-    
-    with open(package_path / 'quick_start.sh', 'w') as f:
-        f.write(script_content)
-    
+
+
+def create_quick_start_script(archive: Archive, package_name: str):
+    """Create quick start deployment script"""
     # Make script executable
-    os.chmod(package_path / 'quick_start.sh', 0o755)
+    _write_generated_file(archive, f"{package_name}/quick_start.sh", _QUICK_START_TMPL, mode=0o755)
     
     print("  ✅ Created quick start script")
 
 
-def create_package_info(package_path: Path, package_name: str):
-    """Create package information file"""
-    package_info = {
-        'name': 'Drug Interaction Prediction API',
-        'version': '1.0.0',
-        'package_name': package_name,
-        'created': datetime.now().isoformat(),
-        'description': 'Production-ready API for drug-drug interaction prediction using machine learning',
-        'features': [
-            'XGBoost-based interaction prediction',
-            'Multi-drug analysis (2-10 drugs)',
-            'RESTful API with comprehensive documentation',
-            'Docker containerization support',
-            'Production-ready with monitoring and backup',
-            'Security hardening and rate limiting',
-            'Nginx reverse proxy configuration',
-            'Automated deployment scripts'
-        ],
-        'requirements': {
-            'python': '3.9+',
-            'memory': '2GB minimum, 4GB recommended',
-            'cpu': '2 cores minimum, 4 cores recommended',
-            'disk': '10GB minimum',
-            'os': 'Ubuntu 20.04+ or CentOS 8+'
-        },
-        'deployment_options': [
-            'Docker containers',
-            'Traditional Linux servers',
-            'Cloud platforms (AWS, GCP, Azure)',
-            'Platform-as-a-Service (Heroku, DigitalOcean)'
-        ],
-        'support': {
-            'documentation': 'docs/',
-            'api_reference': 'docs/API_DOCUMENTATION.md',
-            'deployment_guide': 'PRODUCTION_CHECKLIST.md',
-            'examples': 'tests/',
-            'monitoring': 'scripts/health_monitor.py'
-        }
+_PACKAGE_INFO_TMPL = {
+    'name': 'Drug Interaction Prediction API',
+    'version': '1.0.0',
+    'package_name': None,  # Filled in per package
+    'created': None,
+    'description': 'Production-ready API for drug-drug interaction prediction using machine learning',
+    'features': [
+        'XGBoost-based interaction prediction',
+        'Multi-drug analysis (2-10 drugs)',
+        'RESTful API with comprehensive documentation',
+        'Docker containerization support',
+        'Production-ready with monitoring and backup',
+        'Security hardening and rate limiting',
+        'Nginx reverse proxy configuration',
+        'Automated deployment scripts'
+    ],
+    'requirements': {
+        'python': '3.9+',
+        'memory': '2GB minimum, 4GB recommended',
+        'cpu': '2 cores minimum, 4 cores recommended',
+        'disk': '10GB minimum',
+        'os': 'Ubuntu 20.04+ or CentOS 8+'
+    },
+    'deployment_options': [
+        'Docker containers',
+        'Traditional Linux servers',
+        'Cloud platforms (AWS, GCP, Azure)',
+        'Platform-as-a-Service (Heroku, DigitalOcean)'
+    ],
+    'support': {
+        'documentation': 'docs/',
+        'api_reference': 'docs/API_DOCUMENTATION.md',
+        'deployment_guide': 'PRODUCTION_CHECKLIST.md',
+        'examples': 'tests/',
+        'monitoring': 'scripts/health_monitor.py'
     }
-    
-    with open(package_path / 'package_info.json', 'w') as f:
-        json.dump(package_info, f, indent=2)
-    
-    print("  ✅ Created package information file")
+}
 
 
-def create_zip_archive(source_dir: Path, archive_path: Path):
-    """Create compressed zip archive"""
-    print(f"📦 Creating zip archive: {archive_path}")
+def create_package_info(archive: Archive, package_name: str):
+    """Create package information file"""
+    package_info = {**_PACKAGE_INFO_TMPL, 'package_name': package_name, 'created': datetime.now().isoformat()}
     
-    with zipfile.ZipFile(archive_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-        for file_path in source_dir.rglob('*'):
-            if file_path.is_file():
-                # Calculate relative path
-                relative_path = file_path.relative_to(source_dir.parent)
-                zipf.write(file_path, relative_path)
+    if orjson is not None:
+        content = orjson.dumps(package_info, option=orjson.OPT_INDENT_2)
+    else:
+        content = json.dumps(package_info, indent=2)
     
-    print(f"  ✅ Archive created successfully")
+    _write_generated_file(archive, f"{package_name}/package_info.json", content)
+    
+    print("  ✅ Created package information file")
 
 
 def main():
@@ -427,15 +497,20 @@ def main():
     parser = argparse.ArgumentParser(description='Create Drug Interaction API deployment package')
     parser.add_argument('--output-dir', default='.', help='Output directory (default: current directory)')
     parser.add_argument('--package-name', help='Package name (default: auto-generated with timestamp)')
+    parser.add_argument('--format', choices=sorted(ARCHIVE_EXTENSIONS), default='zip',
+                       help='Archive format (default: zip; tar.gz suits Linux targets)')
     
     args = parser.parse_args()
     
     try:
-        package_path = create_deployment_package(args.output_dir, args.package_name)
+        package_path = create_deployment_package(args.output_dir, args.package_name, args.format)
         print(f"\n✅ Deployment package ready: {package_path}")
         print("\n📋 To deploy:")
-        print("   1. Transfer the zip file to your server")
-        print("   2. Extract: unzip drug-interaction-api-production-*.zip")
+        print("   1. Transfer the archive to your server")
+        if args.format == 'zip':
+            print("   2. Extract: unzip drug-interaction-api-production-*.zip")
+        else:
+            print("   2. Extract: tar -xzf drug-interaction-api-production-*.tar.gz")
         print("   3. Run: sudo ./quick_start.sh")
         print("   4. Follow the prompts for domain configuration")
         
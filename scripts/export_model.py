@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Model Export Script
+
+Converts the pickled XGBoost model into XGBoost's native UBJSON format.
+The SHA256 of the source pickle is written next to the export; the API loads the
+native file only while that hash still matches the pickle, which is faster and does
+not depend on the Python/XGBoost versions that pickled it.
+"""
+
+import os
+import sys
+import pickle
+import hashlib
+import logging
+import argparse
+from typing import Optional
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def export_model(model_path: str, output_path: Optional[str] = None) -> str:
+    """
+    Export a pickled XGBClassifier to the native UBJSON model format
+
+    Args:
+        model_path: Path to the pickled model
+        output_path: Destination file (defaults to the model path with a .ubj suffix)
+
+    Returns:
+        Path of the exported model
+    """
+    if output_path is None:
+        output_path = os.path.splitext(model_path)[0] + '.ubj'
+
+    with open(model_path, 'rb') as f:
+        model = pickle.load(f)
+
+    # The sklearn wrapper stores classes and feature count alongside the trees
+    model.save_model(output_path)
+    
+    # Record which pickle this export came from so a replaced pickle is never shadowed
+    with open(model_path, 'rb') as f:
+        source_hash = hashlib.sha256(f.read()).hexdigest()
+    with open(output_path + '.sha256', 'w') as f:
+        f.write(source_hash + '\n')
+
+    logger.info(f"✅ Exported {model_path} -> {output_path} "
+                f"({os.path.getsize(output_path) / 1024 / 1024:.1f} MB)")
+    return output_path
+
+
+def main():
+    """Main function for command-line usage"""
+    parser = argparse.ArgumentParser(description='Export the XGBoost model to native UBJSON format')
+    parser.add_argument('--model', default='src/xgboost_model.pkl',
+                       help='Pickled model path (default: src/xgboost_model.pkl)')
+    parser.add_argument('--output', help='Output path (default: model path with .ubj suffix)')
+
+    args = parser.parse_args()
+
+    try:
+        export_model(args.model, args.output)
+    except Exception as e:
+        logger.error(f"❌ Model export failed: {str(e)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
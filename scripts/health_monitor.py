@@ -7,16 +7,30 @@ Can be run as a cron job or standalone monitoring service.
 """
 
 import requests
+from requests.adapters import HTTPAdapter
 import json
 import time
+import statistics
 import psutil
 import logging
+import logging.handlers
 import os
 import sys
-from datetime import datetime
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, List
 import argparse
 
+try:
+    import orjson
+except ImportError:  # Optional: falls back to the stdlib json module
+    orjson = None
+
+
+def _utc_timestamp() -> str:
+    """Current time as an ISO 8601 UTC timestamp"""
+    return datetime.now(timezone.utc).isoformat()
+
 
 class HealthMonitor:
     """Comprehensive health monitoring for the Drug Interaction API"""
@@ -27,24 +41,41 @@ class HealthMonitor:
         self.log_file = log_file
         self.setup_logging()
         
+        # Reuse keep-alive connections across all checks in a run
+        self.session = requests.Session()
+        self.session.headers['Connection'] = 'keep-alive'
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        
+        # Prime the CPU sampler so later reads are non-blocking deltas since this point
+        psutil.cpu_percent(interval=None)
+        
     def setup_logging(self):
         """Setup logging configuration"""
+        self.logger = logging.getLogger(__name__)
+        
+        # Logging is already configured; don't open another log file handle
+        if logging.getLogger().handlers:
+            return
+        
         os.makedirs(os.path.dirname(self.log_file), exist_ok=True)
         
         logging.basicConfig(
             level=logging.INFO,
             format='%(asctime)s - %(levelname)s - %(message)s',
             handlers=[
-                logging.FileHandler(self.log_file),
+                # Bounded log size for long-running cron usage
+                logging.handlers.RotatingFileHandler(self.log_file, maxBytes=10 * 1024 * 1024, backupCount=5),
                 logging.StreamHandler(sys.stdout)
             ]
         )
-        self.logger = logging.getLogger(__name__)
     
-    def check_api_health(self) -> Dict[str, Any]:
+    def check_api_health(self, timestamp: str = None) -> Dict[str, Any]:
         """Check API health endpoints"""
+        timestamp = timestamp or _utc_timestamp()
         health_status = {
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': timestamp,
             'basic_health': False,
             'detailed_health': False,
             'response_times': {},
@@ -54,7 +85,7 @@ class HealthMonitor:
         try:
             # Basic health check
             start_time = time.time()
-            response = requests.get(f"{self.api_url}/", timeout=10)
+            response = self.session.get(f"{self.api_url}/", timeout=10)
             health_status['response_times']['basic'] = time.time() - start_time
             
             if response.status_code == 200:
@@ -70,7 +101,7 @@ class HealthMonitor:
         try:
             # Detailed health check
             start_time = time.time()
-            response = requests.get(f"{self.api_url}/health", timeout=10)
+            response = self.session.get(f"{self.api_url}/health", timeout=10)
             health_status['response_times']['detailed'] = time.time() - start_time
             
             if response.status_code == 200:
@@ -85,10 +116,11 @@ class HealthMonitor:
         
         return health_status
     
-    def test_api_functionality(self) -> Dict[str, Any]:
+    def test_api_functionality(self, timestamp: str = None) -> Dict[str, Any]:
         """Test API functionality with a sample prediction"""
+        timestamp = timestamp or _utc_timestamp()
         test_status = {
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': timestamp,
             'prediction_test': False,
             'response_time': 0,
             'errors': []
@@ -120,7 +152,7 @@ class HealthMonitor:
         
         try:
             start_time = time.time()
-            response = requests.post(
+            response = self.session.post(
                 f"{self.api_url}/predict-interactions",
                 json=test_data,
                 headers={'Content-Type': 'application/json'},
@@ -142,81 +174,111 @@ class HealthMonitor:
         
         return test_status
     
-    def check_system_resources(self) -> Dict[str, Any]:
+    def check_system_resources(self, timestamp: str = None) -> Dict[str, Any]:
         """Check system resource usage"""
+        timestamp = timestamp or _utc_timestamp()
         try:
+            memory = psutil.virtual_memory()
+            disk = psutil.disk_usage('/')
             return {
-                'timestamp': datetime.now().isoformat(),
-                'cpu_percent': psutil.cpu_percent(interval=1),
-                'memory_percent': psutil.virtual_memory().percent,
-                'disk_percent': psutil.disk_usage('/').percent,
+                'timestamp': timestamp,
+                'cpu_percent': psutil.cpu_percent(interval=None),
+                'memory_percent': memory.percent,
+                'disk_percent': disk.percent,
                 'load_average': os.getloadavg() if hasattr(os, 'getloadavg') else None,
-                'available_memory_gb': psutil.virtual_memory().available / (1024**3),
-                'disk_free_gb': psutil.disk_usage('/').free / (1024**3)
+                'available_memory_gb': memory.available / (1024**3),
+                'disk_free_gb': disk.free / (1024**3)
             }
         except Exception as e:
             return {
-                'timestamp': datetime.now().isoformat(),
+                'timestamp': timestamp,
                 'error': f"Failed to get system resources: {str(e)}"
             }
     
-    def check_api_performance(self) -> Dict[str, Any]:
+    def check_api_performance(self, timestamp: str = None) -> Dict[str, Any]:
         """Check API performance with multiple requests"""
-        performance_status = {
-            'timestamp': datetime.now().isoformat(),
-            'total_requests': 0,
-            'successful_requests': 0,
-            'failed_requests': 0,
-            'average_response_time': 0,
-            'min_response_time': float('inf'),
-            'max_response_time': 0,
-            'errors': []
-        }
+        timestamp = timestamp or _utc_timestamp()
+        # Test with 5 concurrent requests
+        with ThreadPoolExecutor(max_workers=5) as executor:
+            futures = [executor.submit(self._timed_get, f"{self.api_url}/") for _ in range(5)]
         
-        # Test with 5 concurrent-ish requests
+        # Collect raw latencies and derive the statistics once at the end
         response_times = []
+        total_requests = 0
+        errors = []
         
-        for i in range(5):
+        for i, future in enumerate(futures):
             try:
-                start_time = time.time()
-                response = requests.get(f"{self.api_url}/", timeout=10)
-                response_time = time.time() - start_time
-                
-                performance_status['total_requests'] += 1
+                response, response_time = future.result()
+                total_requests += 1
                 
                 if response.status_code == 200:
-                    performance_status['successful_requests'] += 1
                     response_times.append(response_time)
-                    performance_status['min_response_time'] = min(performance_status['min_response_time'], response_time)
-                    performance_status['max_response_time'] = max(performance_status['max_response_time'], response_time)
                 else:
-                    performance_status['failed_requests'] += 1
-                    performance_status['errors'].append(f"Request {i+1} failed: {response.status_code}")
+                    errors.append(f"Request {i+1} failed: {response.status_code}")
                     
             except Exception as e:
-                performance_status['failed_requests'] += 1
-                performance_status['errors'].append(f"Request {i+1} error: {str(e)}")
-            
-            # Small delay between requests
-            time.sleep(0.1)
+                errors.append(f"Request {i+1} error: {str(e)}")
         
-        if response_times:
-            performance_status['average_response_time'] = sum(response_times) / len(response_times)
-        else:
-            performance_status['min_response_time'] = 0
+        performance_status = {
+            'timestamp': timestamp,
+            'total_requests': total_requests,
+            'successful_requests': len(response_times),
+            'failed_requests': len(errors),
+            'average_response_time': statistics.fmean(response_times) if response_times else 0,
+            'min_response_time': min(response_times, default=0),
+            'max_response_time': max(response_times, default=0),
+            'errors': errors
+        }
         
         return performance_status
     
+    def _timed_get(self, url: str):
+        """GET a URL and return the response with its latency in seconds"""
+        start_time = time.perf_counter()
+        response = self.session.get(url, timeout=10)
+        return response, time.perf_counter() - start_time
+    
     def generate_health_report(self) -> Dict[str, Any]:
         """Generate comprehensive health report"""
         self.logger.info("Starting health check...")
         
+        # One timestamp for the whole report and all of its checks
+        timestamp = _utc_timestamp()
+        api_health = self.check_api_health(timestamp)
+        
+        if api_health['basic_health']:
+            functionality_test = self.test_api_functionality(timestamp)
+            system_resources = self.check_system_resources(timestamp)
+            performance_test = self.check_api_performance(timestamp)
+        else:
+            # API is down; don't wait out the prediction and performance probe timeouts
+            functionality_test = {
+                'timestamp': timestamp,
+                'skipped': True,
+                'prediction_test': False,
+                'response_time': 0,
+                'errors': []
+            }
+            system_resources = self.check_system_resources(timestamp)
+            performance_test = {
+                'timestamp': timestamp,
+                'skipped': True,
+                'total_requests': 0,
+                'successful_requests': 0,
+                'failed_requests': 0,
+                'average_response_time': 0,
+                'min_response_time': 0,
+                'max_response_time': 0,
+                'errors': []
+            }
+        
         report = {
-            'timestamp': datetime.now().isoformat(),
-            'api_health': self.check_api_health(),
-            'functionality_test': self.test_api_functionality(),
-            'system_resources': self.check_system_resources(),
-            'performance_test': self.check_api_performance()
+            'timestamp': timestamp,
+            'api_health': api_health,
+            'functionality_test': functionality_test,
+            'system_resources': system_resources,
+            'performance_test': performance_test
         }
         
         # Overall health assessment
@@ -246,13 +308,17 @@ class HealthMonitor:
     def save_report(self, report: Dict[str, Any], output_file: str = None):
         """Save health report to file"""
         if not output_file:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            timestamp = time.strftime("%Y%m%d_%H%M%S")
             output_file = f"/var/log/drug-api/health_report_{timestamp}.json"
         
         os.makedirs(os.path.dirname(output_file), exist_ok=True)
         
-        with open(output_file, 'w') as f:
-            json.dump(report, f, indent=2)
+        if orjson is not None:
+            with open(output_file, 'wb') as f:
+                f.write(orjson.dumps(report, option=orjson.OPT_INDENT_2))
+        else:
+            with open(output_file, 'w', buffering=1 << 16, encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
         
         self.logger.info(f"Health report saved to: {output_file}")
         return output_file
@@ -0,0 +1,3 @@
+"""
+Drug Interaction Prediction API package
+"""
@@ -7,18 +7,31 @@ Accepts multiple drug data and returns interaction severity predictions.
 
 import os
 import pickle
+import hashlib
 import logging
+from collections import Counter
 from typing import Dict, List, Any, Tuple
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 import pandas as pd
 import numpy as np
+import xgboost as xgb
 from datetime import datetime
 
+try:
+    import orjson
+except ImportError:  # Optional: falls back to Flask's jsonify
+    orjson = None
+
 # Import custom modules
-from preprocessing import DrugDataPreprocessor
-from prediction_service import DrugInteractionPredictor
-from validation import InputValidator
+try:
+    from .preprocessing import DrugDataPreprocessor
+    from .prediction_service import DrugInteractionPredictor, compile_treelite_predictor
+    from .validation import InputValidator, DEFAULT_MAX_DRUGS
+except ImportError:  # Running as a script from the src directory
+    from preprocessing import DrugDataPreprocessor
+    from prediction_service import DrugInteractionPredictor, compile_treelite_predictor
+    from validation import InputValidator, DEFAULT_MAX_DRUGS
 
 # Configure logging
 logging.basicConfig(
@@ -31,12 +44,58 @@ logger = logging.getLogger(__name__)
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
 
+# Upper bound on drugs per request; work grows with the number of pairs, N*(N-1)/2
+MAX_DRUGS_PER_REQUEST = int(os.getenv('MAX_DRUGS_PER_REQUEST', DEFAULT_MAX_DRUGS))
+
 # Global variables for model and services
 model = None
 preprocessor = None
 predictor = None
 validator = None
 
+def json_response(payload: Dict[str, Any]):
+    """Serialize a response payload with orjson when available, else jsonify"""
+    if orjson is None:
+        return jsonify(payload)
+    return app.response_class(
+        orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS),
+        mimetype='application/json'
+    )
+
+def load_model_file(model_path: str):
+    """
+    Load the model, preferring a native XGBoost export (scripts/export_model.py) next to the pickle
+    
+    The export is only used while the source hash recorded beside it matches the pickle,
+    so a retrained or bind-mounted pickle always wins over a stale export.
+    
+    Args:
+        model_path: Path to the pickled model
+        
+    Returns:
+        The loaded XGBClassifier
+    """
+    with open(model_path, 'rb') as f:
+        model_bytes = f.read()
+    
+    native_path = os.path.splitext(model_path)[0] + '.ubj'
+    if os.path.exists(native_path):
+        try:
+            with open(native_path + '.sha256') as f:
+                recorded_hash = f.read().strip()
+        except OSError:
+            recorded_hash = None
+        
+        if recorded_hash == hashlib.sha256(model_bytes).hexdigest():
+            native_model = xgb.XGBClassifier()
+            native_model.load_model(native_path)
+            logger.info(f"✅ Loaded native model export {native_path}")
+            return native_model
+        
+        logger.warning(f"⚠️ Ignoring {native_path}: it was not exported from the current {model_path}")
+    
+    return pickle.loads(model_bytes)
+
 def load_model_and_services():
     """Load the trained model and initialize services"""
     global model, preprocessor, predictor, validator
@@ -59,14 +118,15 @@ def load_model_and_services():
         if not model_path:
             raise FileNotFoundError(f"Model file not found in any of these locations: {possible_paths}")
         
-        with open(model_path, 'rb') as f:
-            model = pickle.load(f)
+        model = load_model_file(model_path)
         logger.info(f"✅ Model loaded successfully from {model_path}")
         
         # Initialize services
         preprocessor = DrugDataPreprocessor()
         predictor = DrugInteractionPredictor(model, preprocessor)
-        validator = InputValidator()
+        if os.getenv('USE_TREELITE', 'False').lower() == 'true':
+            predictor.tl_predictor = compile_treelite_predictor(model, model_path)
+        validator = InputValidator(max_drugs=MAX_DRUGS_PER_REQUEST)
         
         logger.info("✅ All services initialized successfully")
         
@@ -153,6 +213,14 @@ def predict_interactions():
                 'status': 'error'
             }), 400
         
+        # Reject oversized requests before any per-drug or per-pair work
+        drugs = data.get('drugs') if isinstance(data, dict) else None
+        if isinstance(drugs, list) and len(drugs) > MAX_DRUGS_PER_REQUEST:
+            return jsonify({
+                'error': f'At most {MAX_DRUGS_PER_REQUEST} drugs are allowed per request',
+                'status': 'error'
+            }), 413
+        
         # Validate input data
         validation_result = validator.validate_input(data)
         if not validation_result['valid']:
@@ -175,6 +243,7 @@ def predict_interactions():
         predictions = predictor.predict_interactions(drugs)
         
         # Format response
+        severity_counts = Counter(p.get('prediction', {}).get('severity') for p in predictions)
         response = {
             'status': 'success',
             'timestamp': datetime.now().isoformat(),
@@ -182,14 +251,14 @@ def predict_interactions():
             'drug_pairs_analyzed': len(predictions),
             'predictions': predictions,
             'summary': {
-                'high_risk_pairs': len([p for p in predictions if p.get('prediction', {}).get('severity') == 'Major']),
-                'moderate_risk_pairs': len([p for p in predictions if p.get('prediction', {}).get('severity') == 'Moderate']),
-                'low_risk_pairs': len([p for p in predictions if p.get('prediction', {}).get('severity') == 'Minor'])
+                'high_risk_pairs': severity_counts['Major'],
+                'moderate_risk_pairs': severity_counts['Moderate'],
+                'low_risk_pairs': severity_counts['Minor']
             }
         }
         
         logger.info(f"✅ Processed interaction prediction for {len(drugs)} drugs")
-        return jsonify(response)
+        return json_response(response)
         
     except Exception as e:
         logger.error(f"❌ Error in predict_interactions: {str(e)}")
@@ -212,6 +281,7 @@ def api_info():
             '/api/info': 'API information'
         },
         'supported_severity_levels': ['Major', 'Moderate', 'Minor'],
+        'max_drugs_per_request': MAX_DRUGS_PER_REQUEST,
         'required_drug_fields': [
             'drug_name',
             'pharmacodynamic_class',
@@ -5,15 +5,103 @@ Handles the core prediction logic for drug-drug interactions using the trained X
 Processes multiple drugs, generates all possible pairs, and returns interaction predictions.
 """
 
+import os
+import threading
 import numpy as np
 import pandas as pd
 from typing import Dict, List, Any, Tuple
-from itertools import combinations
 import logging
-from preprocessing_config import SEVERITY_LEVELS
+try:
+    from .preprocessing_config import SEVERITY_LEVELS
+except ImportError:  # Running as a script from the src directory
+    from preprocessing_config import SEVERITY_LEVELS
+
+try:
+    import treelite
+    import tl2cgen
+except ImportError:  # Optional: compiled tree inference (pip install treelite tl2cgen)
+    treelite = None
+    tl2cgen = None
 
 logger = logging.getLogger(__name__)
 
+# Batches of at most this many rows use the compiled Treelite predictor (when
+# USE_TREELITE is on); larger batches use XGBoost's own predictor. The two backends
+# can differ in the last float bits, and cached pair scores keep whichever was used.
+TREELITE_MAX_ROWS = int(os.getenv('TREELITE_MAX_ROWS', '16'))
+
+# Maximum number of drug-pair probability rows kept in the prediction cache
+PAIR_CACHE_SIZE = 100_000
+
+# Sort rank of each severity label (higher sorts first)
+SEVERITY_ORDER = {'Major': 3, 'Moderate': 2, 'Minor': 1, 'Unknown': 0}
+
+# Confidence above which a severity's clinical significance is stated as strong
+CONFIDENCE_THRESHOLDS = {'Major': 0.8, 'Moderate': 0.7, 'Minor': 0.6}
+
+# (severity, confidence above threshold) -> (risk level, clinical significance, recommendation)
+_CLINICAL_ANNOTATIONS = {
+    ('Major', True): ('High', "High clinical significance - Strong evidence of major interaction",
+                      "Consider alternative medications or adjust dosing. Consult healthcare provider."),
+    ('Major', False): ('High', "High clinical significance - Potential major interaction",
+                       "Consider alternative medications or adjust dosing. Consult healthcare provider."),
+    ('Moderate', True): ('Medium', "Moderate clinical significance - Monitor patient closely",
+                         "Monitor patient for adverse effects. Consider dose adjustment if needed."),
+    ('Moderate', False): ('Medium', "Moderate clinical significance - Consider monitoring",
+                          "Monitor patient for adverse effects. Consider dose adjustment if needed."),
+    ('Minor', True): ('Low', "Low clinical significance - Minimal interaction expected",
+                      "Generally safe combination. Routine monitoring recommended."),
+    ('Minor', False): ('Low', "Low clinical significance - Uncertain interaction",
+                       "Generally safe combination. Routine monitoring recommended."),
+}
+_UNKNOWN_ANNOTATION = ('Unknown', "Unknown clinical significance", "Consult healthcare provider for guidance.")
+
+
+def _drug_fingerprint(drug: Dict[str, Any]) -> Tuple:
+    """Hashable key of the drug attributes that feed the model (the name does not)"""
+    return (
+        float(drug['logp']),
+        float(drug['plasma_protein_binding']),
+        drug.get('pharmacodynamic_class', ''),
+        drug.get('therapeutic_index', ''),
+        drug.get('transporter_interaction', ''),
+        drug.get('metabolic_pathways', '')
+    )
+
+
+def compile_treelite_predictor(model, model_path: str):
+    """
+    Compile the model's tree ensemble to a native shared library with Treelite
+    
+    The library is cached next to the model file and only rebuilt when the model changes.
+    
+    Args:
+        model: Trained XGBoost model
+        model_path: Path of the pickled model file
+        
+    Returns:
+        tl2cgen.Predictor, or None if Treelite is unavailable or compilation fails
+    """
+    if treelite is None or tl2cgen is None:
+        logger.warning("⚠️ Treelite requested but not installed; using XGBoost predictor")
+        return None
+    
+    try:
+        lib_path = os.path.splitext(model_path)[0] + '.so'
+        if not os.path.exists(lib_path) or os.path.getmtime(lib_path) < os.path.getmtime(model_path):
+            logger.info("🔧 Compiling model with Treelite (one-time, may take a minute)...")
+            tl_model = treelite.frontend.from_xgboost(model.get_booster())
+            tl2cgen.export_lib(tl_model, toolchain='gcc', libpath=lib_path, params={'parallel_comp': 32})
+        
+        tl_predictor = tl2cgen.Predictor(lib_path, nthread=1)
+        logger.info(f"✅ Treelite predictor loaded from {lib_path}")
+        return tl_predictor
+        
+    except Exception as e:
+        logger.warning(f"⚠️ Treelite compilation failed, using XGBoost predictor: {str(e)}")
+        return None
+
+
 class DrugInteractionPredictor:
     """Handles drug interaction prediction using the trained model"""
     
@@ -28,6 +116,18 @@ class DrugInteractionPredictor:
         self.model = model
         self.preprocessor = preprocessor
         self.severity_levels = SEVERITY_LEVELS
+        
+        # Predict through the raw booster when available; inplace_predict skips
+        # the sklearn wrapper's input checks and DMatrix construction
+        self.booster = model.get_booster() if hasattr(model, 'get_booster') else None
+        # Optional compiled predictor for small batches, see compile_treelite_predictor
+        self.tl_predictor = None
+        
+        # Class probabilities per (drug A, drug B) fingerprint. Pair order matters
+        # because the model has separate A and B features. The cache belongs to
+        # this predictor, so it is dropped together with the model it was built from.
+        self._pair_cache = {}
+        self._pair_cache_lock = threading.Lock()
 
         # Create mapping from model classes to severity labels
         # Model classes are typically [0, 1, 2] corresponding to severity levels
@@ -38,6 +138,13 @@ class DrugInteractionPredictor:
                     self.class_to_severity[str(class_label)] = self.severity_levels[i]
                 else:
                     self.class_to_severity[str(class_label)] = 'Unknown'
+        
+        # Severity label per model class index, for vectorized lookups
+        self._class_severities = np.array(
+            [self.class_to_severity.get(str(c), 'Unknown') for c in getattr(model, 'classes_', [])],
+            dtype=object
+        )
+        self._class_severity_ranks = np.array([SEVERITY_ORDER.get(label, 0) for label in self._class_severities])
 
         logger.info("✅ DrugInteractionPredictor initialized")
         logger.info(f"Class to severity mapping: {self.class_to_severity}")
@@ -53,25 +160,38 @@ class DrugInteractionPredictor:
             List of prediction results for each drug pair
         """
         try:
-            predictions = []
+            # Generate all possible drug pairs as two index arrays (same order as combinations)
+            pair_a, pair_b = np.triu_indices(len(drugs), k=1)
+            n_pairs = len(pair_a)
             
-            # Generate all possible drug pairs
-            drug_pairs = list(combinations(range(len(drugs)), 2))
+            logger.info(f"🔍 Analyzing {n_pairs} drug pairs from {len(drugs)} drugs")
             
-            logger.info(f"🔍 Analyzing {len(drug_pairs)} drug pairs from {len(drugs)} drugs")
+            try:
+                probabilities = self._score_pairs(drugs, pair_a, pair_b)
+                severities, confidences, ranks = self._classify(probabilities)
+            except Exception as e:
+                # Fall back to pair-by-pair scoring so one bad pair only fails its own row
+                logger.warning(f"⚠️ Batch prediction failed, scoring pairs individually: {str(e)}")
+                probabilities = None
             
-            for i, (idx_a, idx_b) in enumerate(drug_pairs):
-                drug_a = drugs[idx_a]
-                drug_b = drugs[idx_b]
-                
-                # Predict interaction for this pair
-                prediction = self._predict_single_pair(drug_a, drug_b, idx_a, idx_b)
-                predictions.append(prediction)
-                
-                logger.debug(f"Processed pair {i+1}/{len(drug_pairs)}: {drug_a['drug_name']} + {drug_b['drug_name']}")
-            
-            # Sort predictions by severity (Major > Moderate > Minor)
-            predictions = self._sort_predictions_by_severity(predictions)
+            pair_a = pair_a.tolist()
+            pair_b = pair_b.tolist()
+            if probabilities is not None:
+                # Build results directly in severity/confidence order (Major > Moderate > Minor).
+                # lexsort is stable, so ties keep pair order exactly like the sort below.
+                order = np.lexsort((-np.asarray(confidences), -ranks))
+                predictions = [
+                    self._build_prediction(drugs[pair_a[i]], drugs[pair_b[i]], pair_a[i], pair_b[i],
+                                           probabilities[i], severities[i], confidences[i])
+                    for i in order.tolist()
+                ]
+            else:
+                predictions = [
+                    self._predict_single_pair(drugs[idx_a], drugs[idx_b], idx_a, idx_b)
+                    for idx_a, idx_b in zip(pair_a, pair_b)
+                ]
+                # Sort predictions by severity (Major > Moderate > Minor)
+                predictions = self._sort_predictions_by_severity(predictions)
             
             logger.info(f"✅ Completed analysis of {len(predictions)} drug pairs")
             return predictions
@@ -80,6 +200,43 @@ class DrugInteractionPredictor:
             logger.error(f"❌ Error in predict_interactions: {str(e)}")
             raise
     
+    def _score_pairs(self, drugs: List[Dict[str, Any]], pair_a: np.ndarray, pair_b: np.ndarray) -> np.ndarray:
+        """
+        Get class probabilities for each drug pair, serving repeated pairs from the cache
+        
+        Args:
+            drugs: List of drug dictionaries with characteristics
+            pair_a: Index into drugs of the first drug of each pair
+            pair_b: Index into drugs of the second drug of each pair
+            
+        Returns:
+            Array of shape (n_pairs, n_classes) with class probabilities
+        """
+        if not len(pair_a):
+            return np.empty((0, len(self._class_severities)))
+        
+        fingerprints = [_drug_fingerprint(drug) for drug in drugs]
+        keys = [(fingerprints[idx_a], fingerprints[idx_b]) for idx_a, idx_b in zip(pair_a.tolist(), pair_b.tolist())]
+        
+        with self._pair_cache_lock:
+            rows = [self._pair_cache.get(key) for key in keys]
+        
+        missing = [i for i, row in enumerate(rows) if row is None]
+        if missing:
+            # Score every uncached pair with a single model call
+            feature_matrix = self.preprocessor.preprocess_drug_pairs_batch(drugs, pair_a[missing], pair_b[missing])
+            probabilities = self._predict_proba(feature_matrix)
+            
+            with self._pair_cache_lock:
+                for i, row in zip(missing, probabilities):
+                    rows[i] = row
+                    self._pair_cache[keys[i]] = row
+                # Evict the oldest entries (dicts keep insertion order)
+                while len(self._pair_cache) > PAIR_CACHE_SIZE:
+                    del self._pair_cache[next(iter(self._pair_cache))]
+        
+        return np.vstack(rows)
+    
     def _predict_single_pair(self, drug_a: Dict[str, Any], drug_b: Dict[str, Any], 
                            idx_a: int, idx_b: int) -> Dict[str, Any]:
         """
@@ -99,50 +256,11 @@ class DrugInteractionPredictor:
             feature_vector = self.preprocessor.preprocess_drug_pair(drug_a, drug_b)
             
             # Get prediction probabilities
-            probabilities = self.model.predict_proba(feature_vector)[0]
-            
-            # Get predicted class
-            predicted_class_idx = np.argmax(probabilities)
-            predicted_class_raw = str(self.model.classes_[predicted_class_idx])
-            predicted_severity = self.class_to_severity.get(predicted_class_raw, 'Unknown')
-
-            # Get confidence score
-            confidence = float(probabilities[predicted_class_idx])
-
-            # Create probability distribution (ensure all keys and values are JSON serializable)
-            prob_distribution = {}
-            for i, class_label in enumerate(self.model.classes_):
-                severity_label = self.class_to_severity.get(str(class_label), 'Unknown')
-                prob_distribution[severity_label] = float(probabilities[i])
+            probabilities = self._predict_proba(feature_vector)
+            severities, confidences, _ = self._classify(probabilities)
             
-            # Determine risk level
-            risk_level = self._get_risk_level(predicted_severity)
-            
-            # Create prediction result (ensure all values are JSON serializable)
-            prediction = {
-                'drug_pair': {
-                    'drug_a': {
-                        'index': int(idx_a),
-                        'name': str(drug_a['drug_name']),
-                        'class': str(drug_a['pharmacodynamic_class'])
-                    },
-                    'drug_b': {
-                        'index': int(idx_b),
-                        'name': str(drug_b['drug_name']),
-                        'class': str(drug_b['pharmacodynamic_class'])
-                    }
-                },
-                'prediction': {
-                    'severity': str(predicted_severity),
-                    'confidence': float(confidence),
-                    'risk_level': str(risk_level)
-                },
-                'probability_distribution': prob_distribution,
-                'clinical_significance': self._get_clinical_significance(predicted_severity, confidence),
-                'recommendation': self._get_recommendation(predicted_severity, confidence)
-            }
-            
-            return prediction
+            return self._build_prediction(drug_a, drug_b, idx_a, idx_b, probabilities[0],
+                                          severities[0], confidences[0])
             
         except Exception as e:
             logger.error(f"❌ Error predicting single pair: {str(e)}")
@@ -160,53 +278,107 @@ class DrugInteractionPredictor:
                 'error': str(e)
             }
     
-    def _get_risk_level(self, severity: str) -> str:
-        """Convert severity to risk level"""
-        risk_mapping = {
-            'Major': 'High',
-            'Moderate': 'Medium',
-            'Minor': 'Low'
-        }
-        return risk_mapping.get(severity, 'Unknown')
+    def _predict_proba(self, feature_matrix: np.ndarray) -> np.ndarray:
+        """
+        Get class probabilities for each row of a feature matrix
+        
+        Args:
+            feature_matrix: Array of shape (n_rows, n_features)
+            
+        Returns:
+            Array of shape (n_rows, n_classes) with class probabilities
+        """
+        if self.tl_predictor is not None and len(feature_matrix) <= TREELITE_MAX_ROWS:
+            rows = np.ascontiguousarray(feature_matrix, dtype=np.float32)
+            return self.tl_predictor.predict(tl2cgen.DMatrix(rows)).reshape(len(rows), -1)
+        
+        if self.booster is None:
+            return self.model.predict_proba(feature_matrix)
+        
+        probabilities = self.booster.inplace_predict(np.ascontiguousarray(feature_matrix, dtype=np.float32))
+        if probabilities.ndim == 1:
+            # Binary objectives return only the positive-class probability
+            probabilities = np.column_stack([1 - probabilities, probabilities])
+        return probabilities
     
-    def _get_clinical_significance(self, severity: str, confidence: float) -> str:
-        """Get clinical significance description"""
-        if severity == 'Major':
-            if confidence > 0.8:
-                return "High clinical significance - Strong evidence of major interaction"
-            else:
-                return "High clinical significance - Potential major interaction"
-        elif severity == 'Moderate':
-            if confidence > 0.7:
-                return "Moderate clinical significance - Monitor patient closely"
-            else:
-                return "Moderate clinical significance - Consider monitoring"
-        elif severity == 'Minor':
-            if confidence > 0.6:
-                return "Low clinical significance - Minimal interaction expected"
-            else:
-                return "Low clinical significance - Uncertain interaction"
-        else:
-            return "Unknown clinical significance"
+    def _classify(self, probabilities: np.ndarray) -> Tuple[np.ndarray, List[float], np.ndarray]:
+        """
+        Get the predicted severity and its confidence for every row at once
+        
+        Args:
+            probabilities: Array of shape (n_rows, n_classes) with class probabilities
+            
+        Returns:
+            Tuple of (severity label per row, confidence per row, severity sort rank per row)
+        """
+        predicted_class_idx = probabilities.argmax(axis=1)
+        confidences = probabilities[np.arange(len(predicted_class_idx)), predicted_class_idx].tolist()
+        return (self._class_severities[predicted_class_idx], confidences,
+                self._class_severity_ranks[predicted_class_idx])
     
-    def _get_recommendation(self, severity: str, confidence: float) -> str:
-        """Get clinical recommendation"""
-        if severity == 'Major':
-            return "Consider alternative medications or adjust dosing. Consult healthcare provider."
-        elif severity == 'Moderate':
-            return "Monitor patient for adverse effects. Consider dose adjustment if needed."
-        elif severity == 'Minor':
-            return "Generally safe combination. Routine monitoring recommended."
-        else:
-            return "Consult healthcare provider for guidance."
+    def _build_prediction(self, drug_a: Dict[str, Any], drug_b: Dict[str, Any],
+                          idx_a: int, idx_b: int, probabilities: np.ndarray,
+                          predicted_severity: str, confidence: float) -> Dict[str, Any]:
+        """
+        Build the prediction result for a drug pair from its class probabilities
+        
+        Args:
+            drug_a: First drug characteristics
+            drug_b: Second drug characteristics
+            idx_a: Index of first drug in original list
+            idx_b: Index of second drug in original list
+            probabilities: Model class probabilities for this pair
+            predicted_severity: Severity label of the most likely class
+            confidence: Probability of the most likely class
+            
+        Returns:
+            Dictionary containing prediction results
+        """
+        # Create probability distribution
+        prob_distribution = dict(zip(self._class_severities, probabilities.tolist()))
+
+        # Determine risk level, clinical significance and recommendation
+        risk_level, significance, recommendation = self._annotate(predicted_severity, confidence)
+
+        # Create prediction result; only the client-supplied fields need coercing,
+        # the model outputs are already native Python types via .tolist()
+        prediction = {
+            'drug_pair': {
+                'drug_a': {
+                    'index': idx_a,
+                    'name': str(drug_a['drug_name']),
+                    'class': str(drug_a['pharmacodynamic_class'])
+                },
+                'drug_b': {
+                    'index': idx_b,
+                    'name': str(drug_b['drug_name']),
+                    'class': str(drug_b['pharmacodynamic_class'])
+                }
+            },
+            'prediction': {
+                'severity': predicted_severity,
+                'confidence': confidence,
+                'risk_level': risk_level
+            },
+            'probability_distribution': prob_distribution,
+            'clinical_significance': significance,
+            'recommendation': recommendation
+        }
+
+        return prediction
+    
+    def _annotate(self, severity: str, confidence: float) -> Tuple[str, str, str]:
+        """Get (risk level, clinical significance, recommendation) for a prediction"""
+        threshold = CONFIDENCE_THRESHOLDS.get(severity)
+        if threshold is None:
+            return _UNKNOWN_ANNOTATION
+        return _CLINICAL_ANNOTATIONS[(severity, confidence > threshold)]
     
     def _sort_predictions_by_severity(self, predictions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Sort predictions by severity level (Major > Moderate > Minor)"""
-        severity_order = {'Major': 3, 'Moderate': 2, 'Minor': 1, 'Unknown': 0}
-        
         return sorted(predictions, 
                      key=lambda x: (
-                         severity_order.get(x['prediction']['severity'], 0),
+                         SEVERITY_ORDER.get(x['prediction']['severity'], 0),
                          x['prediction']['confidence']
                      ), 
                      reverse=True)
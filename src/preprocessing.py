@@ -5,20 +5,41 @@ Handles transformation of drug data into the format expected by the trained mode
 Uses the preprocessing configuration generated during model training.
 """
 
+import threading
 import pandas as pd
 import numpy as np
 from typing import Dict, List, Any, Tuple
 import logging
-from preprocessing_config import (
-    CATEGORICAL_MAPPINGS, 
-    FEATURE_COLUMNS, 
-    NUMERICAL_STATS,
-    PERCENTAGE_COLUMNS,
-    ENGINEERED_FEATURES
-)
+try:
+    from .preprocessing_config import (
+        CATEGORICAL_MAPPINGS, 
+        FEATURE_COLUMNS, 
+        NUMERICAL_STATS,
+        PERCENTAGE_COLUMNS,
+        ENGINEERED_FEATURES
+    )
+except ImportError:  # Running as a script from the src directory
+    from preprocessing_config import (
+        CATEGORICAL_MAPPINGS, 
+        FEATURE_COLUMNS, 
+        NUMERICAL_STATS,
+        PERCENTAGE_COLUMNS,
+        ENGINEERED_FEATURES
+    )
 
 logger = logging.getLogger(__name__)
 
+# Maximum number of encoded drugs kept in the per-drug encoding cache
+DRUG_CACHE_SIZE = 10_000
+
+# Input field feeding each categorical feature group (suffixed _A / _B per drug)
+CATEGORICAL_INPUT_FIELDS = {
+    'Pharmacodynamic_Class': 'pharmacodynamic_class',
+    'Therapeutic_Index': 'therapeutic_index',
+    'Transporter_Interaction': 'transporter_interaction',
+    'Metabolic_Pathways': 'metabolic_pathways'
+}
+
 class DrugDataPreprocessor:
     """Handles preprocessing of drug data for model prediction"""
     
@@ -29,6 +50,45 @@ class DrugDataPreprocessor:
         self.numerical_stats = NUMERICAL_STATS
         self.percentage_columns = PERCENTAGE_COLUMNS
         self.engineered_features = ENGINEERED_FEATURES
+        self.n_features = len(self.feature_columns)
+        
+        # Columns holding drug B's own features, and column positions by name
+        b_columns = {'LogP_B', 'Plasma_Protein_Binding_B'}
+        for field_name, categories in self.categorical_mappings.items():
+            if field_name.endswith('_B'):
+                b_columns.update(f"{field_name}_{category}" for category in categories)
+        self._b_slot_mask = np.array([name in b_columns for name in self.feature_columns])
+        self._column_index = {name: i for i, name in enumerate(self.feature_columns)}
+        
+        # One-hot lookups per drug slot: (input key, category -> column, 'Other' column).
+        # 'Other' is set for any value outside the known categories.
+        categorical_fields = {'A': [], 'B': []}
+        encoded_columns = {'LogP_A', 'LogP_B', 'Plasma_Protein_Binding_A', 'Plasma_Protein_Binding_B'}
+        encoded_columns.update(self.engineered_features)
+        for group, input_key in CATEGORICAL_INPUT_FIELDS.items():
+            for side, fields in categorical_fields.items():
+                field_name = f"{group}_{side}"
+                if field_name not in self.categorical_mappings:
+                    continue
+                categories = self.categorical_mappings[field_name]
+                category_columns = {
+                    category: self._column_index[f"{field_name}_{category}"]
+                    for category in categories
+                    if category != 'Other' and f"{field_name}_{category}" in self._column_index
+                }
+                fields.append((input_key, category_columns, self._column_index.get(f"{field_name}_Other")))
+                encoded_columns.update(f"{field_name}_{category}" for category in categories)
+        self._categorical_fields_a = tuple(categorical_fields['A'])
+        self._categorical_fields_b = tuple(categorical_fields['B'])
+        
+        for feature_name in self.feature_columns:
+            if feature_name not in encoded_columns:
+                # Should not happen with proper preprocessing
+                logger.warning(f"⚠️ Missing feature: {feature_name}, using 0")
+        
+        # Encoded rows by drug attributes (the name does not feed the model), shared across requests
+        self._drug_cache = {}
+        self._drug_cache_lock = threading.Lock()
         
         logger.info("✅ DrugDataPreprocessor initialized")
     
@@ -41,80 +101,116 @@ class DrugDataPreprocessor:
             drug_b: Dictionary containing drug B characteristics
             
         Returns:
-            numpy array with preprocessed features in the correct order
+            float32 numpy array of shape (1, n_features) in the order expected by the model
         """
         try:
-            # Create a dictionary to store all features
-            features = {}
-            
-            # Extract basic numerical features
-            features['LogP_A'] = float(drug_a['logp'])
-            features['LogP_B'] = float(drug_b['logp'])
-            features['Plasma_Protein_Binding_A'] = float(drug_a['plasma_protein_binding'])
-            features['Plasma_Protein_Binding_B'] = float(drug_b['plasma_protein_binding'])
-            
-            # Engineer additional features
-            features['LogP_diff'] = features['LogP_A'] - features['LogP_B']
-            features['LogP_ratio'] = features['LogP_A'] / features['LogP_B'] if features['LogP_B'] != 0 else 0
-            features['Protein_Binding_diff'] = features['Plasma_Protein_Binding_A'] - features['Plasma_Protein_Binding_B']
-            features['Protein_Binding_avg'] = (features['Plasma_Protein_Binding_A'] + features['Plasma_Protein_Binding_B']) / 2
-            
-            # Process categorical features
-            self._add_categorical_features(features, drug_a, drug_b)
-            
-            # Convert to feature vector in the correct order
-            feature_vector = self._create_feature_vector(features)
-            
-            return feature_vector
+            # Combine the two (cached) drug encodings, same as a one-pair batch
+            return self.preprocess_drug_pairs_batch([drug_a, drug_b], [0], [1])
             
         except Exception as e:
             logger.error(f"❌ Error preprocessing drug pair: {str(e)}")
             raise
     
-    def _add_categorical_features(self, features: Dict[str, float], drug_a: Dict[str, Any], drug_b: Dict[str, Any]):
-        """Add one-hot encoded categorical features"""
-        
-        # Map drug data to categorical fields
-        categorical_data = {
-            'Pharmacodynamic_Class_A': drug_a.get('pharmacodynamic_class', ''),
-            'Pharmacodynamic_Class_B': drug_b.get('pharmacodynamic_class', ''),
-            'Therapeutic_Index_A': drug_a.get('therapeutic_index', ''),
-            'Therapeutic_Index_B': drug_b.get('therapeutic_index', ''),
-            'Transporter_Interaction_A': drug_a.get('transporter_interaction', ''),
-            'Transporter_Interaction_B': drug_b.get('transporter_interaction', ''),
-            'Metabolic_Pathways_A': drug_a.get('metabolic_pathways', ''),
-            'Metabolic_Pathways_B': drug_b.get('metabolic_pathways', '')
-        }
+    def preprocess_drug_pairs(self, drugs: List[Dict[str, Any]]) -> np.ndarray:
+        """
+        Preprocess every pair of drugs in one pass
         
-        # Process each categorical field
-        for field_name, value in categorical_data.items():
-            if field_name in self.categorical_mappings:
-                categories = self.categorical_mappings[field_name]
-                
-                # One-hot encode
-                for category in categories:
-                    feature_name = f"{field_name}_{category}"
-                    if category == 'Other':
-                        # 'Other' is 1 if the value is not in the known categories
-                        features[feature_name] = 1.0 if value not in categories[:-1] else 0.0
-                    else:
-                        # Regular category matching
-                        features[feature_name] = 1.0 if value == category else 0.0
+        Args:
+            drugs: List of drug dictionaries
+            
+        Returns:
+            float32 numpy array of shape (N*(N-1)/2, n_features), rows in
+            itertools.combinations order
+        """
+        pair_a, pair_b = np.triu_indices(len(drugs), k=1)
+        return self.preprocess_drug_pairs_batch(drugs, pair_a, pair_b)
     
-    def _create_feature_vector(self, features: Dict[str, float]) -> np.ndarray:
-        """Create feature vector in the exact order expected by the model"""
+    def preprocess_drug_pairs_batch(self, drugs: List[Dict[str, Any]],
+                                    pair_a: np.ndarray, pair_b: np.ndarray) -> np.ndarray:
+        """
+        Preprocess many drug pairs into a single feature matrix
+        
+        Args:
+            drugs: List of drug dictionaries
+            pair_a: Index into drugs of the first drug of each pair
+            pair_b: Index into drugs of the second drug of each pair
+            
+        Returns:
+            float32 numpy array of shape (len(pair_a), n_features), one row per pair,
+            laid out contiguously as XGBoost's inplace_predict expects
+        """
+        pair_a = np.asarray(pair_a, dtype=np.intp)
+        pair_b = np.asarray(pair_b, dtype=np.intp)
         
-        feature_vector = []
+        # Encode each drug once, not once per pair it appears in
+        encoded = np.zeros((len(drugs), self.n_features))
+        for idx in np.union1d(pair_a, pair_b).tolist():
+            encoded[idx] = self.encode_drug(drugs[idx])
+        encoded_a = encoded[pair_a]
+        encoded_b = encoded[pair_b]
         
-        for feature_name in self.feature_columns:
-            if feature_name in features:
-                feature_vector.append(features[feature_name])
-            else:
-                # If feature is missing, use 0 (should not happen with proper preprocessing)
-                logger.warning(f"⚠️ Missing feature: {feature_name}, using 0")
-                feature_vector.append(0.0)
+        feature_matrix = np.empty((len(pair_a), self.n_features), dtype=np.float32)
+        np.copyto(feature_matrix, np.where(self._b_slot_mask, encoded_b, encoded_a), casting='same_kind')
+        
+        # Pair-engineered features, computed in float64 exactly as preprocess_drug_pair does
+        col = self._column_index
+        logp_a = encoded_a[:, col['LogP_A']]
+        logp_b = encoded_b[:, col['LogP_B']]
+        binding_a = encoded_a[:, col['Plasma_Protein_Binding_A']]
+        binding_b = encoded_b[:, col['Plasma_Protein_Binding_B']]
+        feature_matrix[:, col['LogP_diff']] = logp_a - logp_b
+        feature_matrix[:, col['LogP_ratio']] = np.divide(logp_a, logp_b, out=np.zeros_like(logp_a),
+                                                         where=logp_b != 0)
+        feature_matrix[:, col['Protein_Binding_diff']] = binding_a - binding_b
+        feature_matrix[:, col['Protein_Binding_avg']] = (binding_a + binding_b) / 2
+        return feature_matrix
+    
+    def encode_drug(self, drug: Dict[str, Any]) -> np.ndarray:
+        """
+        Encode a single drug's features in both the A and B slots of a feature vector
+        
+        Args:
+            drug: Dictionary containing drug characteristics
+            
+        Returns:
+            Read-only numpy array of length n_features; pair-engineered features are left at 0
+        """
+        key = (drug.get('logp'), drug.get('plasma_protein_binding'),
+               *(drug.get(input_key, '') for input_key in CATEGORICAL_INPUT_FIELDS.values()))
+        try:
+            with self._drug_cache_lock:
+                cached = self._drug_cache.get(key)
+        except TypeError:  # Unhashable attribute value, encode without caching
+            key = cached = None
+        if cached is not None:
+            return cached
         
-        return np.array(feature_vector).reshape(1, -1)
+        col = self._column_index
+        encoded = np.zeros(self.n_features)
+        encoded[col['LogP_A']] = encoded[col['LogP_B']] = float(drug['logp'])
+        encoded[col['Plasma_Protein_Binding_A']] = encoded[col['Plasma_Protein_Binding_B']] = \
+            float(drug['plasma_protein_binding'])
+        self._add_categorical_features(encoded, drug, drug)
+        encoded.flags.writeable = False
+        
+        if key is not None:
+            with self._drug_cache_lock:
+                self._drug_cache[key] = encoded
+                # Evict the oldest entries (dicts keep insertion order)
+                while len(self._drug_cache) > DRUG_CACHE_SIZE:
+                    del self._drug_cache[next(iter(self._drug_cache))]
+        return encoded
+    
+    def _add_categorical_features(self, feature_vector: np.ndarray, drug_a: Dict[str, Any], drug_b: Dict[str, Any]):
+        """Set the one-hot encoded categorical features in a feature vector"""
+        for drug, fields in ((drug_a, self._categorical_fields_a), (drug_b, self._categorical_fields_b)):
+            for input_key, category_columns, other_column in fields:
+                try:
+                    column = category_columns.get(drug.get(input_key, ''), other_column)
+                except TypeError:  # Unhashable value, can't be a known category
+                    column = other_column
+                if column is not None:
+                    feature_vector[column] = 1.0
     
     def validate_drug_data(self, drug: Dict[str, Any]) -> Tuple[bool, List[str]]:
         """
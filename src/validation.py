@@ -5,20 +5,34 @@ Provides comprehensive validation for drug data input, ensuring data quality
 and proper error handling for the prediction service.
 """
 
-import re
 from typing import Dict, List, Any, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Characters that make a drug name look like markup or an injection attempt
+UNUSUAL_NAME_CHARS = frozenset('<>{}[]\\')
+
+# Default drug limit per request; the API passes its configured MAX_DRUGS_PER_REQUEST
+DEFAULT_MAX_DRUGS = 10
+
+# Hard limit that bounds validation work for badly malformed payloads
+MAX_VALIDATION_ERRORS = 50
+
 class InputValidator:
     """Handles validation of input data for drug interaction prediction"""
     
-    def __init__(self):
-        """Initialize the validator with validation rules"""
+    def __init__(self, max_drugs: int = DEFAULT_MAX_DRUGS):
+        """
+        Initialize the validator with validation rules
+        
+        Args:
+            max_drugs: Maximum number of drugs accepted in one request
+        """
+        self.max_drugs = max_drugs
         
         # Required fields for each drug
-        self.required_fields = [
+        self.required_fields = (
             'drug_name',
             'pharmacodynamic_class',
             'logp',
@@ -26,25 +40,36 @@ class InputValidator:
             'transporter_interaction',
             'plasma_protein_binding',
             'metabolic_pathways'
-        ]
+        )
         
         # Valid ranges for numerical fields
         self.numerical_ranges = {
             'logp': {'min': -10.0, 'max': 15.0, 'type': float},
             'plasma_protein_binding': {'min': 0.0, 'max': 100.0, 'type': float}
         }
+        # (min, max) per field, unpacked once for the per-drug range checks
+        self._numerical_bounds = {
+            field_name: (range_info['min'], range_info['max'])
+            for field_name, range_info in self.numerical_ranges.items()
+        }
         
-        # Valid values for categorical fields (common ones)
-        self.valid_therapeutic_indices = ['NTI', 'Non-NTI']
+        # Valid values for categorical fields (common ones); the ordered
+        # display tuples feed messages and the schema, the frozensets lookups
+        self.valid_therapeutic_indices_display = ('NTI', 'Non-NTI')
+        self.valid_therapeutic_indices = frozenset(self.valid_therapeutic_indices_display)
         
         # Common pharmacodynamic classes (for validation warnings)
-        self.common_drug_classes = [
+        self.common_drug_classes_display = (
             'Antibiotic', 'Antidepressant', 'Antidiabetic', 'Antifungal',
             'Antihistamine', 'Antimalarial', 'Antipsychotic', 'Corticosteroid',
             'Diuretic', 'Tyrosine Kinase Inhibitor', 'Immunosuppressant',
             'Beta-2 Agonist', 'Antineoplastic', 'Opioid Analgesic',
             'Androgen Synthesis Inhibitor', 'Antiandrogen', 'Antiprotozoal'
-        ]
+        )
+        self.common_drug_classes = frozenset(self.common_drug_classes_display)
+        
+        # The schema only depends on the rules above, so build it once
+        self._schema = self._build_validation_schema()
         
         logger.info("✅ InputValidator initialized")
     
@@ -90,6 +115,15 @@ class InputValidator:
                     'warnings': warnings
                 }
             
+            # Refuse payloads over the drug limit before validating drug by drug
+            if len(drugs) > self.max_drugs:
+                errors.append(f"Too many drugs ({len(drugs)}); at most {self.max_drugs} are allowed")
+                return {
+                    'valid': False,
+                    'errors': errors,
+                    'warnings': warnings
+                }
+            
             # Check minimum number of drugs
             if len(drugs) < 2:
                 errors.append("At least 2 drugs are required for interaction analysis")
@@ -103,10 +137,23 @@ class InputValidator:
                 drug_errors, drug_warnings = self._validate_single_drug(drug, i)
                 errors.extend(drug_errors)
                 warnings.extend(drug_warnings)
+                if len(errors) > MAX_VALIDATION_ERRORS:
+                    errors.append(f"Too many errors; validation stopped after drug {i + 1}")
+                    break
             
-            # Check for duplicate drug names
-            drug_names = [drug.get('drug_name', '').lower() for drug in drugs if 'drug_name' in drug]
-            if len(drug_names) != len(set(drug_names)):
+            # Check for duplicate drug names, stopping at the first one; non-object
+            # entries and non-string names were already reported per drug above
+            seen_names = set()
+            has_duplicates = False
+            for drug in drugs:
+                name = drug.get('drug_name') if isinstance(drug, dict) else None
+                if isinstance(name, str):
+                    name = name.lower()
+                    if name in seen_names:
+                        has_duplicates = True
+                        break
+                    seen_names.add(name)
+            if has_duplicates:
                 warnings.append("Duplicate drug names detected - this may affect interaction analysis")
             
             return {
@@ -198,7 +245,7 @@ class InputValidator:
             warnings.append(f"{drug_prefix}: Drug name is unusually long")
         
         # Check for suspicious characters
-        if re.search(r'[<>{}[\]\\]', name):
+        if not UNUSUAL_NAME_CHARS.isdisjoint(name):
             warnings.append(f"{drug_prefix}: Drug name contains unusual characters")
         
         return errors, warnings
@@ -215,10 +262,11 @@ class InputValidator:
             return errors
         
         # Check range if defined
-        if field_name in self.numerical_ranges:
-            range_info = self.numerical_ranges[field_name]
-            if num_value < range_info['min'] or num_value > range_info['max']:
-                errors.append(f"{drug_prefix}: Field '{field_name}' value {num_value} is outside valid range [{range_info['min']}, {range_info['max']}]")
+        bounds = self._numerical_bounds.get(field_name)
+        if bounds is not None:
+            min_value, max_value = bounds
+            if num_value < min_value or num_value > max_value:
+                errors.append(f"{drug_prefix}: Field '{field_name}' value {num_value} is outside valid range [{min_value}, {max_value}]")
         
         # Check for extreme values
         if abs(num_value) > 1000:
@@ -234,7 +282,7 @@ class InputValidator:
             return warnings
         
         if value not in self.valid_therapeutic_indices:
-            warnings.append(f"{drug_prefix}: Therapeutic index '{value}' is not a standard value (expected: {', '.join(self.valid_therapeutic_indices)})")
+            warnings.append(f"{drug_prefix}: Therapeutic index '{value}' is not a standard value (expected: {', '.join(self.valid_therapeutic_indices_display)})")
         
         return warnings
     
@@ -255,8 +303,12 @@ class InputValidator:
         Get the validation schema for API documentation
         
         Returns:
-            Dictionary describing the expected input format
+            Dictionary describing the expected input format (shared, do not modify)
         """
+        return self._schema
+    
+    def _build_validation_schema(self) -> Dict[str, Any]:
+        """Build the validation schema from the validator's rules"""
         return {
             'type': 'object',
             'required': ['drugs'],
@@ -264,10 +316,10 @@ class InputValidator:
                 'drugs': {
                     'type': 'array',
                     'minItems': 2,
-                    'maxItems': 10,
+                    'maxItems': self.max_drugs,
                     'items': {
                         'type': 'object',
-                        'required': self.required_fields,
+                        'required': list(self.required_fields),
                         'properties': {
                             'drug_name': {
                                 'type': 'string',
@@ -278,7 +330,7 @@ class InputValidator:
                             'pharmacodynamic_class': {
                                 'type': 'string',
                                 'description': 'Pharmacodynamic class of the drug',
-                                'examples': self.common_drug_classes[:5]
+                                'examples': list(self.common_drug_classes_display[:5])
                             },
                             'logp': {
                                 'type': 'number',
@@ -288,7 +340,7 @@ class InputValidator:
                             },
                             'therapeutic_index': {
                                 'type': 'string',
-                                'enum': self.valid_therapeutic_indices,
+                                'enum': list(self.valid_therapeutic_indices_display),
                                 'description': 'Therapeutic index classification'
                             },
                             'transporter_interaction': {
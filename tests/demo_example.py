@@ -4,8 +4,20 @@ Demonstration of the Drug Interaction Prediction API
 This script shows how to use the API with real drug examples
 """
 
-import requests
 import json
+import urllib.error
+import urllib.request
+
+def _http_request(url: str, payload=None, timeout: float = 30):
+    """Send a GET, or a JSON POST when payload is given; return (status code, body text)"""
+    data = json.dumps(payload).encode() if payload is not None else None
+    headers = {"Content-Type": "application/json"} if data is not None else {}
+    request = urllib.request.Request(url, data=data, headers=headers)
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return response.status, response.read().decode()
+    except urllib.error.HTTPError as e:
+        return e.code, e.read().decode()
 
 def demo_drug_interactions():
     base_url = "http://localhost:5000"
@@ -53,15 +65,10 @@ def demo_drug_interactions():
     print("\n🔍 Sending request to API...")
     
     try:
-        response = requests.post(
-            f"{base_url}/predict-interactions",
-            json=demo_drugs,
-            headers={"Content-Type": "application/json"},
-            timeout=30
-        )
+        status, body = _http_request(f"{base_url}/predict-interactions", demo_drugs)
         
-        if response.status_code == 200:
-            result = response.json()
+        if status == 200:
+            result = json.loads(body)
             
             print("✅ Analysis completed successfully!")
             print(f"\n📊 Summary:")
@@ -96,8 +103,8 @@ def demo_drug_interactions():
             return True
             
         else:
-            print(f"❌ API request failed: {response.status_code}")
-            print(f"Response: {response.text}")
+            print(f"❌ API request failed: {status}")
+            print(f"Response: {body}")
             return False
             
     except Exception as e:
@@ -109,9 +116,9 @@ def show_api_info():
     base_url = "http://localhost:5000"
     
     try:
-        response = requests.get(f"{base_url}/api/info")
-        if response.status_code == 200:
-            info = response.json()
+        status, body = _http_request(f"{base_url}/api/info")
+        if status == 200:
+            info = json.loads(body)
             print("\n📚 API Information:")
             print(f"   • Name: {info.get('api_name')}")
             print(f"   • Version: {info.get('version')}")
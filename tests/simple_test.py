@@ -3,15 +3,23 @@ Simple test script to verify the Drug Interaction API is working
 """
 
 import requests
+from requests.adapters import HTTPAdapter
 import json
 
+# Shared session so both checks reuse one keep-alive connection
+SESSION = requests.Session()
+SESSION.headers.update({"Content-Type": "application/json"})
+_adapter = HTTPAdapter(pool_connections=4, pool_maxsize=4)
+SESSION.mount("http://", _adapter)
+SESSION.mount("https://", _adapter)
+
 def test_api():
     base_url = "http://localhost:5000"
     
     # Test health check
     print("Testing health check...")
     try:
-        response = requests.get(f"{base_url}/")
+        response = SESSION.get(f"{base_url}/")
         if response.status_code == 200:
             print("✅ Health check passed")
             print(f"Response: {response.json()}")
@@ -48,10 +56,9 @@ def test_api():
     }
     
     try:
-        response = requests.post(
+        response = SESSION.post(
             f"{base_url}/predict-interactions",
             json=test_data,
-            headers={"Content-Type": "application/json"},
             timeout=30
         )
         
@@ -5,60 +5,71 @@ Tests the web server functionality with sample data and validates responses.
 """
 
 import requests
+from requests.adapters import HTTPAdapter
 import json
 import time
 import sys
-from typing import Dict, Any
+import io
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Callable, Optional, TextIO, Tuple
 
 # Test configuration
 BASE_URL = "http://localhost:5000"
 TIMEOUT = 30
 
-def test_health_check():
+# Shared session so every test reuses pooled keep-alive connections
+# (one pooled connection per concurrently running test)
+SESSION = requests.Session()
+SESSION.headers.update({"Content-Type": "application/json"})
+_adapter = HTTPAdapter(pool_connections=8, pool_maxsize=8)
+SESSION.mount("http://", _adapter)
+SESSION.mount("https://", _adapter)
+
+def test_health_check(out: Optional[TextIO] = None):
     """Test the health check endpoint"""
-    print("🔍 Testing health check endpoint...")
+    print("🔍 Testing health check endpoint...", file=out)
     
     try:
-        response = requests.get(f"{BASE_URL}/", timeout=TIMEOUT)
+        response = SESSION.get(f"{BASE_URL}/", timeout=TIMEOUT)
         
         if response.status_code == 200:
             data = response.json()
-            print(f"✅ Health check passed")
-            print(f"   Status: {data.get('status')}")
-            print(f"   Model loaded: {data.get('model_loaded')}")
+            print(f"✅ Health check passed", file=out)
+            print(f"   Status: {data.get('status')}", file=out)
+            print(f"   Model loaded: {data.get('model_loaded')}", file=out)
             return True
         else:
-            print(f"❌ Health check failed with status {response.status_code}")
+            print(f"❌ Health check failed with status {response.status_code}", file=out)
             return False
             
     except requests.exceptions.RequestException as e:
-        print(f"❌ Health check failed: {str(e)}")
+        print(f"❌ Health check failed: {str(e)}", file=out)
         return False
 
-def test_api_info():
+def test_api_info(out: Optional[TextIO] = None):
     """Test the API info endpoint"""
-    print("\n🔍 Testing API info endpoint...")
+    print("\n🔍 Testing API info endpoint...", file=out)
     
     try:
-        response = requests.get(f"{BASE_URL}/api/info", timeout=TIMEOUT)
+        response = SESSION.get(f"{BASE_URL}/api/info", timeout=TIMEOUT)
         
         if response.status_code == 200:
             data = response.json()
-            print(f"✅ API info retrieved successfully")
-            print(f"   API Name: {data.get('api_name')}")
-            print(f"   Version: {data.get('version')}")
+            print(f"✅ API info retrieved successfully", file=out)
+            print(f"   API Name: {data.get('api_name')}", file=out)
+            print(f"   Version: {data.get('version')}", file=out)
             return True
         else:
-            print(f"❌ API info failed with status {response.status_code}")
+            print(f"❌ API info failed with status {response.status_code}", file=out)
             return False
             
     except requests.exceptions.RequestException as e:
-        print(f"❌ API info failed: {str(e)}")
+        print(f"❌ API info failed: {str(e)}", file=out)
         return False
 
-def test_prediction_valid_data():
+def test_prediction_valid_data(out: Optional[TextIO] = None):
     """Test prediction with valid drug data"""
-    print("\n🔍 Testing prediction with valid data...")
+    print("\n🔍 Testing prediction with valid data...", file=out)
     
     test_data = {
         "drugs": [
@@ -84,40 +95,39 @@ def test_prediction_valid_data():
     }
     
     try:
-        response = requests.post(
+        response = SESSION.post(
             f"{BASE_URL}/predict-interactions",
             json=test_data,
-            headers={"Content-Type": "application/json"},
             timeout=TIMEOUT
         )
         
         if response.status_code == 200:
             data = response.json()
-            print(f"✅ Prediction successful")
-            print(f"   Status: {data.get('status')}")
-            print(f"   Drugs analyzed: {data.get('input_drugs_count')}")
-            print(f"   Pairs analyzed: {data.get('drug_pairs_analyzed')}")
+            print(f"✅ Prediction successful", file=out)
+            print(f"   Status: {data.get('status')}", file=out)
+            print(f"   Drugs analyzed: {data.get('input_drugs_count')}", file=out)
+            print(f"   Pairs analyzed: {data.get('drug_pairs_analyzed')}", file=out)
             
             if data.get('predictions'):
                 pred = data['predictions'][0]
-                print(f"   First prediction:")
-                print(f"     Severity: {pred['prediction']['severity']}")
-                print(f"     Confidence: {pred['prediction']['confidence']:.3f}")
-                print(f"     Risk Level: {pred['prediction']['risk_level']}")
+                print(f"   First prediction:", file=out)
+                print(f"     Severity: {pred['prediction']['severity']}", file=out)
+                print(f"     Confidence: {pred['prediction']['confidence']:.3f}", file=out)
+                print(f"     Risk Level: {pred['prediction']['risk_level']}", file=out)
             
             return True
         else:
-            print(f"❌ Prediction failed with status {response.status_code}")
-            print(f"   Response: {response.text}")
+            print(f"❌ Prediction failed with status {response.status_code}", file=out)
+            print(f"   Response: {response.text}", file=out)
             return False
             
     except requests.exceptions.RequestException as e:
-        print(f"❌ Prediction failed: {str(e)}")
+        print(f"❌ Prediction failed: {str(e)}", file=out)
         return False
 
-def test_prediction_multiple_drugs():
+def test_prediction_multiple_drugs(out: Optional[TextIO] = None):
     """Test prediction with multiple drugs"""
-    print("\n🔍 Testing prediction with multiple drugs...")
+    print("\n🔍 Testing prediction with multiple drugs...", file=out)
     
     test_data = {
         "drugs": [
@@ -152,36 +162,35 @@ def test_prediction_multiple_drugs():
     }
     
     try:
-        response = requests.post(
+        response = SESSION.post(
             f"{BASE_URL}/predict-interactions",
             json=test_data,
-            headers={"Content-Type": "application/json"},
             timeout=TIMEOUT
         )
         
         if response.status_code == 200:
             data = response.json()
-            print(f"✅ Multiple drug prediction successful")
-            print(f"   Drugs analyzed: {data.get('input_drugs_count')}")
-            print(f"   Pairs analyzed: {data.get('drug_pairs_analyzed')}")
+            print(f"✅ Multiple drug prediction successful", file=out)
+            print(f"   Drugs analyzed: {data.get('input_drugs_count')}", file=out)
+            print(f"   Pairs analyzed: {data.get('drug_pairs_analyzed')}", file=out)
             
             summary = data.get('summary', {})
-            print(f"   High risk pairs: {summary.get('high_risk_pairs', 0)}")
-            print(f"   Moderate risk pairs: {summary.get('moderate_risk_pairs', 0)}")
-            print(f"   Low risk pairs: {summary.get('low_risk_pairs', 0)}")
+            print(f"   High risk pairs: {summary.get('high_risk_pairs', 0)}", file=out)
+            print(f"   Moderate risk pairs: {summary.get('moderate_risk_pairs', 0)}", file=out)
+            print(f"   Low risk pairs: {summary.get('low_risk_pairs', 0)}", file=out)
             
             return True
         else:
-            print(f"❌ Multiple drug prediction failed with status {response.status_code}")
+            print(f"❌ Multiple drug prediction failed with status {response.status_code}", file=out)
             return False
             
     except requests.exceptions.RequestException as e:
-        print(f"❌ Multiple drug prediction failed: {str(e)}")
+        print(f"❌ Multiple drug prediction failed: {str(e)}", file=out)
         return False
 
-def test_prediction_invalid_data():
+def test_prediction_invalid_data(out: Optional[TextIO] = None):
     """Test prediction with invalid data to check error handling"""
-    print("\n🔍 Testing prediction with invalid data...")
+    print("\n🔍 Testing prediction with invalid data...", file=out)
     
     # Test with missing required field
     invalid_data = {
@@ -208,30 +217,29 @@ def test_prediction_invalid_data():
     }
     
     try:
-        response = requests.post(
+        response = SESSION.post(
             f"{BASE_URL}/predict-interactions",
             json=invalid_data,
-            headers={"Content-Type": "application/json"},
             timeout=TIMEOUT
         )
         
         if response.status_code == 400:
             data = response.json()
-            print(f"✅ Invalid data properly rejected")
-            print(f"   Status: {data.get('status')}")
-            print(f"   Error: {data.get('error')}")
+            print(f"✅ Invalid data properly rejected", file=out)
+            print(f"   Status: {data.get('status')}", file=out)
+            print(f"   Error: {data.get('error')}", file=out)
             return True
         else:
-            print(f"❌ Invalid data not properly handled (status: {response.status_code})")
+            print(f"❌ Invalid data not properly handled (status: {response.status_code})", file=out)
             return False
             
     except requests.exceptions.RequestException as e:
-        print(f"❌ Invalid data test failed: {str(e)}")
+        print(f"❌ Invalid data test failed: {str(e)}", file=out)
         return False
 
-def test_prediction_insufficient_drugs():
+def test_prediction_insufficient_drugs(out: Optional[TextIO] = None):
     """Test prediction with insufficient drugs"""
-    print("\n🔍 Testing prediction with insufficient drugs...")
+    print("\n🔍 Testing prediction with insufficient drugs...", file=out)
     
     insufficient_data = {
         "drugs": [
@@ -248,42 +256,41 @@ def test_prediction_insufficient_drugs():
     }
     
     try:
-        response = requests.post(
+        response = SESSION.post(
             f"{BASE_URL}/predict-interactions",
             json=insufficient_data,
-            headers={"Content-Type": "application/json"},
             timeout=TIMEOUT
         )
         
         if response.status_code == 400:
             data = response.json()
-            print(f"✅ Insufficient drugs properly rejected")
-            print(f"   Error: {data.get('error')}")
+            print(f"✅ Insufficient drugs properly rejected", file=out)
+            print(f"   Error: {data.get('error')}", file=out)
             return True
         else:
-            print(f"❌ Insufficient drugs not properly handled (status: {response.status_code})")
+            print(f"❌ Insufficient drugs not properly handled (status: {response.status_code})", file=out)
             return False
             
     except requests.exceptions.RequestException as e:
-        print(f"❌ Insufficient drugs test failed: {str(e)}")
+        print(f"❌ Insufficient drugs test failed: {str(e)}", file=out)
         return False
 
-def test_404_endpoint():
+def test_404_endpoint(out: Optional[TextIO] = None):
     """Test 404 handling"""
-    print("\n🔍 Testing 404 endpoint...")
+    print("\n🔍 Testing 404 endpoint...", file=out)
     
     try:
-        response = requests.get(f"{BASE_URL}/nonexistent", timeout=TIMEOUT)
+        response = SESSION.get(f"{BASE_URL}/nonexistent", timeout=TIMEOUT)
         
         if response.status_code == 404:
-            print(f"✅ 404 properly handled")
+            print(f"✅ 404 properly handled", file=out)
             return True
         else:
-            print(f"❌ 404 not properly handled (status: {response.status_code})")
+            print(f"❌ 404 not properly handled (status: {response.status_code})", file=out)
             return False
             
     except requests.exceptions.RequestException as e:
-        print(f"❌ 404 test failed: {str(e)}")
+        print(f"❌ 404 test failed: {str(e)}", file=out)
         return False
 
 def run_all_tests():
@@ -301,15 +308,26 @@ def run_all_tests():
         ("404 Handling", test_404_endpoint)
     ]
     
-    results = []
-    
-    for test_name, test_func in tests:
+    # Tests are independent, so run them concurrently; each writes to its own
+    # buffer, and the buffers are printed in order once every test has finished
+    def run_test(test_name: str, test_func: Callable[..., bool]) -> Tuple[bool, str]:
+        out = io.StringIO()
         try:
-            result = test_func()
-            results.append((test_name, result))
+            result = test_func(out=out)
         except Exception as e:
-            print(f"❌ {test_name} failed with exception: {str(e)}")
-            results.append((test_name, False))
+            print(f"❌ {test_name} failed with exception: {str(e)}", file=out)
+            result = False
+        return result, out.getvalue()
+    
+    with ThreadPoolExecutor(max_workers=len(tests)) as executor:
+        futures = [(test_name, executor.submit(run_test, test_name, test_func))
+                   for test_name, test_func in tests]
+        outcomes = [(test_name, future.result()) for test_name, future in futures]
+    
+    results = []
+    for test_name, (result, output) in outcomes:
+        sys.stdout.write(output)
+        results.append((test_name, result))
     
     # Summary
     print("\n" + "=" * 50)